@@ -38,6 +38,16 @@ class Day2Plan:
     return_draft_when_enough: bool = True
     max_context: int = 1200
     embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: Optional[int] = None  # None 이면 인덱스 manifest 의 dimensions 사용
+    hybrid: bool = True             # bm25.npz 가 있으면 BM25 + 벡터 RRF 결합
+    rrf_k: int = 60
+    sparse_skip_embed: bool = False  # 질의가 상위 BM25 문서에 그대로 등장하면 임베딩 호출 생략(게이트는 coverage 기준)
+    sparse_gate_min_tokens: int = 3  # 임베딩 생략 결과를 enough 로 볼 최소 질의 토큰 수
+    filters: Optional[dict] = None  # 예 {"type": "pdf", "path_prefix": "data/", "date_from": "2024-01-01"}
+    rerank: Optional[str] = None    # "lexical" | "cross:<모델>" : 후보 rerank_fetch 개를 재순위화 후 top_k
+    rerank_fetch: int = 50
+    rerank_budget_ms: float = 50.0  # 질의별 재순위화 예산, 넘기면 1단계 순서로 폴백
+    semantic_cache_threshold: Optional[float] = None  # 예 0.95: 과거 질의와 코사인 ≥ 값이면 그 결과 재사용(None=끔)
 
 # (선택) RAG Context 아이템도 dataclass를 쓸 경우 예시
 @dataclass
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Day2 검색 품질/지연 벤치마크
+- 합성 코퍼스(결정적, seed 고정) 또는 지정 코퍼스(--paths + --queries JSONL)로 인덱스 종류별 빌드 → 질의 세트 실행
+- 임베딩: 결정적 로컬 임베더(기본 hash:256, 네트워크/과금 없음)
+- 지표(설정별): recall@1/5/10, MRR@10, 단건 검색 지연 p50/p95/p99, 배치 검색 QPS,
+  빌드 처리량(chunks/s), 메모리(faiss 인덱스 직렬화 크기 + 상주 BM25/메타 배열, docs/sidecar 는 mmap 이라 제외), 디스크 크기
+- 결과는 JSON(--out) 으로 저장 → --baseline 으로 이전 커밋 결과와 비교
+  (행마다 실제 생성된 faiss factory 를 표시하고 비교 키는 (config, factory). ivfpq 는 청크가 256*39 개 미만이면
+   IVF-Flat 으로 생성되므로 PQ 를 재려면 --docs 를 키울 것 — 기본 2000 문서는 미달, fallback 표시)
+
+예)
+  python -m student.day2.bench --configs flat,ivf,ivfpq,hnsw,flat+int8 --docs 3000
+  python -m student.day2.bench --baseline data/processed/20240101_000000__day2_bench.json
+  python -m student.day2.bench --paths data/raw --queries data/bench_queries.jsonl   # {"query":..., "relevant":[경로,...]}
+"""
+
+import os, sys, json, time, random, shutil, tempfile, platform, subprocess, gc
+from pathlib import Path
+
+# ───────── 0) 루트 탐색 + sys.path ─────────
+def _find_root(start: Path) -> Path:
+    for p in [start, *start.parents]:
+        if (p / "pyproject.toml").exists() or (p / ".git").exists() or (p / "apps").exists():
+            return p
+    return start
+
+ROOT = _find_root(Path(__file__).resolve())
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import faiss
+
+from student.day2.impl.build_index import build_index
+from student.day2.impl.embeddings import Embeddings
+from student.day2.impl.manifest import read_manifest
+from student.day2.impl.store import FaissStore
+
+DEFAULT_CONFIGS = "flat,ivf,ivfpq,hnsw,flat+fp16,flat+int8"
+KS = (1, 5, 10)
+
+# ───────── 1) 합성 코퍼스 ─────────
+_SYLLABLES = ("가나다라마바사아자차카타파하거너더러머버서어저처커터퍼허고노도로모보소오조초코토포호"
+              "구누두루무부수우주추쿠투푸후기니디리미비시이지치키티피히개내대래매배새애재채")
+_JOSA = ("은", "는", "이", "가", "을", "를", "의", "에", "에서", "으로", "와", "과")
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def synth_corpus(out_dir: str, n_docs: int = 2000, n_queries: int = 300, seed: int = 0):
+    """
+    문서마다 고유 핵심어 6개 + 공통 어휘로 문단 구성(.md) → 질의는 한 문서의 핵심어 3개 + 공통어 1~2개 + 조사
+    반환: (파일 경로 목록, [{"query", "relevant": [경로]}])
+    """
+    rng = random.Random(seed)
+    common = [_word(rng) for _ in range(400)]
+    os.makedirs(out_dir, exist_ok=True)
+    paths, keys = [], []
+    for d in range(n_docs):
+        key = [_word(rng) + _word(rng) for _ in range(6)]
+        paras = []
+        for _ in range(rng.randint(2, 4)):
+            sents = []
+            for _ in range(rng.randint(3, 6)):
+                words = rng.sample(common, rng.randint(5, 9)) + rng.sample(key, 2)
+                rng.shuffle(words)
+                sents.append(" ".join(w + rng.choice(_JOSA) if rng.random() < 0.4 else w for w in words) + ".")
+            paras.append(" ".join(sents))
+        path = os.path.join(out_dir, f"doc_{d:05d}.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# 문서 {d} {key[0]}\n\n" + "\n\n".join(paras) + "\n")
+        paths.append(path)
+        keys.append(key)
+    queries = []
+    for d in rng.sample(range(n_docs), min(n_queries, n_docs)):
+        words = rng.sample(keys[d], 3) + rng.sample(common, rng.randint(1, 2))
+        rng.shuffle(words)
+        queries.append({"query": " ".join(w + rng.choice(_JOSA) if rng.random() < 0.5 else w for w in words),
+                        "relevant": [paths[d]]})
+    return paths, queries
+
+
+def _read_queries(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(ln) for ln in f if ln.strip()]
+    for r in rows:
+        r["relevant"] = [os.path.normpath(p) for p in r.get("relevant", [])]
+    return rows
+
+# ───────── 2) 측정 유틸 ─────────
+def _mem_bytes(store) -> int:
+    """
+    조회 프로세스 상주 메모리 추정: faiss 인덱스(직렬화 크기 ≈ 메모리 내 코드/그래프/리스트) + BM25/메타 numpy 배열
+    (프로세스 RSS 차이는 할당자 재사용 때문에 설정을 연달아 잴 때 신뢰하기 어려워 구성 요소 합으로 계산)
+    """
+    total = int(faiss.serialize_index(store.index).nbytes)
+    for part in (store.sparse, store.columns):
+        if part is not None:
+            total += sum(v.nbytes for v in vars(part).values() if isinstance(v, np.ndarray))
+    return total
+
+
+def _dir_bytes(path: str) -> int:
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def _pct(xs, q) -> float:
+    return round(float(np.percentile(xs, q)), 4) if len(xs) else 0.0
+
+
+def _parse_config(spec: str):
+    """"hnsw" | "flat+int8" → (index_type, quantize)"""
+    index_type, _, quantize = spec.partition("+")
+    return index_type, (quantize or None)
+
+
+def _quality(hits_per_query, queries):
+    """hits: 질의별 검색 결과(순위순) → recall@k(관련 문서가 상위 k 에 있는 질의 비율), MRR@10"""
+    found = np.zeros((len(queries), max(KS)), dtype=bool)
+    for qi, (hits, q) in enumerate(zip(hits_per_query, queries)):
+        rel = set(q["relevant"])
+        for r, h in enumerate(hits[:max(KS)]):
+            found[qi, r] = os.path.normpath(h["meta"].get("path", "")) in rel
+    out = {f"recall@{k}": round(float(found[:, :k].any(axis=1).mean()), 4) for k in KS}
+    first = np.where(found.any(axis=1), found.argmax(axis=1) + 1, 0)
+    out[f"mrr@{max(KS)}"] = round(float(np.mean([1.0 / r if r else 0.0 for r in first])), 4)
+    return out
+
+# ───────── 3) 설정별 실행 ─────────
+def run_config(spec: str, paths, queries, work_dir: str, model: str, warmup: int = 10,
+               nprobe: int = None, ef_search: int = None):
+    index_type, quantize = _parse_config(spec)
+    index_dir = os.path.join(work_dir, spec.replace("+", "_"))
+    shutil.rmtree(index_dir, ignore_errors=True)
+
+    t0 = time.perf_counter()
+    build_index(paths, index_dir, model=model, index_type=index_type, quantize=quantize,
+                nprobe=nprobe, ef_search=ef_search)
+    build_s = time.perf_counter() - t0
+    manifest = read_manifest(index_dir) or {}
+    count = int(manifest.get("count", 0))
+
+    emb = Embeddings(model=model)
+    qm = emb.encode([q["query"] for q in queries])
+
+    store = FaissStore.load_dir(index_dir)
+
+    for i in range(min(warmup, len(qm))):
+        store.search(qm[i], top_k=max(KS))
+    lat, hits = [], []
+    for i in range(len(qm)):
+        t = time.perf_counter()
+        hits.append(store.search(qm[i], top_k=max(KS)))
+        lat.append((time.perf_counter() - t) * 1000.0)
+    t = time.perf_counter()
+    store.search_batch(qm, top_k=max(KS))
+    batch_s = time.perf_counter() - t
+
+    factory = manifest.get("index_factory")
+    fallback = index_type == "ivfpq" and "PQ" not in (factory or "")
+    if fallback:
+        print(f"[bench] 경고: {spec} 는 청크 {count}개(< 256*39)라 {factory} 로 생성됨 — PQ 수치가 아님", flush=True)
+    row = {"config": spec, "index_type": index_type, "quantize": quantize,
+           "factory": factory, "fallback": fallback, "search_params": manifest.get("search_params"),
+           "chunks": count, "build_s": round(build_s, 3),
+           "chunks_per_s": round(count / build_s, 1) if build_s > 0 else 0.0}
+    row.update(_quality(hits, queries))
+    row.update({"p50_ms": _pct(lat, 50), "p95_ms": _pct(lat, 95), "p99_ms": _pct(lat, 99),
+                "batch_qps": round(len(qm) / batch_s, 1) if batch_s > 0 else 0.0,
+                "mem_bytes": _mem_bytes(store),
+                "index_bytes": os.path.getsize(os.path.join(index_dir, "faiss.index")),
+                "disk_bytes": _dir_bytes(index_dir)})
+    del store
+    gc.collect()
+    return row
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_bench(configs, model: str = "hash:256", paths=None, queries=None, n_docs: int = 2000,
+              n_queries: int = 300, seed: int = 0, work_dir: str = None, keep: bool = False,
+              nprobe: int = None, ef_search: int = None):
+    """설정 목록 실행 → 결과 dict (JSON 직렬화 가능)"""
+    os.environ.pop("DAY2_EMB_CACHE_DIR", None)  # 빌드 처리량은 임베딩 캐시 없이 측정
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="day2_bench_")
+    try:
+        corpus = {"source": "fixture", "paths": paths}
+        if paths is None:
+            paths, queries = synth_corpus(os.path.join(work_dir, "corpus"), n_docs, n_queries, seed)
+            corpus = {"source": "synthetic", "docs": n_docs, "seed": seed}
+        corpus["queries"] = len(queries)
+        results = []
+        for spec in configs:
+            print(f"[bench] {spec} ...", flush=True)
+            results.append(run_config(spec, paths, queries, work_dir, model, nprobe=nprobe, ef_search=ef_search))
+        return {"schema": 1, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "commit": _git_commit(),
+                "env": {"python": platform.python_version(), "numpy": np.__version__,
+                        "faiss": getattr(faiss, "__version__", None), "machine": platform.machine(),
+                        "cpus": os.cpu_count()},
+                "model": model, "corpus": corpus, "results": results}
+    finally:
+        if own_dir and not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+# ───────── 4) 출력 ─────────
+_COLS = ("config", "factory", "chunks", "chunks_per_s", "recall@1", "recall@10", "mrr@10", "p50_ms", "p95_ms", "p99_ms",
+         "batch_qps", "mem_bytes", "disk_bytes")
+
+
+def print_table(result, baseline=None):
+    """baseline 비교는 같은 (config, factory) 행끼리만 (factory 가 다르면 다른 인덱스이므로 비교 생략)"""
+    base = {(r["config"], r.get("factory")): r for r in (baseline or {}).get("results", [])}
+    print(" | ".join(_COLS))
+    for r in result["results"]:
+        cells = []
+        for c in _COLS:
+            v = r.get(c)
+            b = base.get((r["config"], r.get("factory")), {}).get(c)
+            if c != "config" and isinstance(v, (int, float)) and isinstance(b, (int, float)) and b:
+                cells.append(f"{v} ({(v - b) / abs(b) * 100:+.1f}%)")
+            else:
+                cells.append(str(v))
+        print(" | ".join(cells))
+
+
+def parse_args():
+    import argparse
+    p = argparse.ArgumentParser(description="Day2 검색 품질/지연 벤치마크")
+    p.add_argument("--configs", default=DEFAULT_CONFIGS, help="쉼표 구분 index_type[+fp16|int8]")
+    p.add_argument("--model", default="hash:256", help="결정적 로컬 임베더 권장 (hash:<차원>, local:<모델>)")
+    p.add_argument("--docs", type=int, default=2000, help="합성 코퍼스 문서 수")
+    p.add_argument("--queries_n", type=int, default=300, help="합성 질의 수")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--nprobe", type=int, default=None, help="IVF 계열 nprobe (기본: nlist/16, 최소 8)")
+    p.add_argument("--ef_search", type=int, default=None, help="HNSW efSearch (기본: faiss 기본값)")
+    p.add_argument("--paths", nargs="*", default=None, help="지정 코퍼스(주면 --queries 필요)")
+    p.add_argument("--queries", default=None, help='JSONL: {"query": ..., "relevant": [경로, ...]}')
+    p.add_argument("--work_dir", default=None, help="인덱스 작업 디렉토리(기본: 임시, 종료 시 삭제)")
+    p.add_argument("--keep", action="store_true", help="임시 작업 디렉토리 유지")
+    p.add_argument("--out", default=None, help="결과 JSON 경로(기본: data/processed/<시각>__day2_bench.json)")
+    p.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if bool(args.paths) != bool(args.queries):
+        sys.exit("--paths 와 --queries 는 함께 지정해야 합니다.")
+    queries = _read_queries(args.queries) if args.queries else None
+    result = run_bench([c.strip() for c in args.configs.split(",") if c.strip()], model=args.model,
+                       paths=args.paths, queries=queries, n_docs=args.docs, n_queries=args.queries_n,
+                       seed=args.seed, work_dir=args.work_dir, keep=args.keep,
+                       nprobe=args.nprobe, ef_search=args.ef_search)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(result, baseline)
+
+    out = Path(args.out) if args.out else ROOT / "data" / "processed" / f"{time.strftime('%Y%m%d_%H%M%S')}__day2_bench.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[OK] 벤치마크 결과 저장: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+BM25 희소 인덱스 (한국어 토큰화, faiss.index 옆 bm25.npz 로 저장)
+- 토큰화: 영숫자 코드(KS-2024-001 → 전체 + 조각), 한글 어절(조사 제거 + 음절 bigram), 한자 1글자
+- 문서 id = docs 위치(= 벡터 id). tombstone(None) 문서는 길이 0, 포스팅 없음
+- 저장 형식: CSR 포스팅(offsets/doc/tf) + 어휘(유니코드 배열) + 문서 길이 → np.load 만으로 로드(pickle 없음)
+"""
+
+from __future__ import annotations
+import os, re
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
+
+BM25_NAME = "bm25.npz"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*|[가-힣]+|[一-鿿]")
+_CODE_SPLIT_RE = re.compile(r"[-_./]")
+_JOSA_RE = re.compile(r"(?:으로써|으로서|에서는|에게서|이라는|으로|에서|에게|까지|부터|보다|이라|라는|이며|에는|와의|과의|"
+                      r"은|는|이|가|을|를|의|에|로|와|과|도|만)$")
+_WS_RE = re.compile(r"\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    out: List[str] = []
+    for m in _TOKEN_RE.finditer((text or "").lower()):
+        t = m.group()
+        c = t[0]
+        if "가" <= c <= "힣":
+            stem = _JOSA_RE.sub("", t) if len(t) > 2 else t
+            stem = stem or t
+            out.append(stem)
+            if len(stem) >= 3:  # 복합명사(청년창업지원) 부분 일치용 bigram
+                out.extend(stem[i:i + 2] for i in range(len(stem) - 1))
+        else:
+            out.append(t)
+            if len(t) > 1 and _CODE_SPLIT_RE.search(t):
+                out.extend(p for p in _CODE_SPLIT_RE.split(t) if p)
+    return out
+
+
+def normalize_query(text: str) -> str:
+    return _WS_RE.sub(" ", (text or "").lower()).strip()
+
+
+class BM25Index:
+    def __init__(self, vocab: Dict[str, int], offsets: np.ndarray, doc: np.ndarray, tf: np.ndarray,
+                 doc_len: np.ndarray, k1: float = 1.2, b: float = 0.75):
+        self.vocab = vocab
+        self.offsets, self.doc, self.tf = offsets, doc, tf
+        self.doc_len = doc_len
+        self.k1, self.b = float(k1), float(b)
+        live = doc_len > 0
+        self.n_docs = int(live.sum())
+        self.avgdl = float(doc_len[live].mean()) if self.n_docs else 1.0
+        df = np.diff(offsets).astype("float64")
+        self.idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5)).astype("float32")
+        self._norm = (self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)).astype("float32")
+
+    # ---------- Build ----------
+    @classmethod
+    def build(cls, texts: Iterable[Optional[str]], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """texts: docs 순서대로의 본문(삭제된 자리는 None)"""
+        vocab: Dict[str, int] = {}
+        rows: List[np.ndarray] = []
+        cols: List[np.ndarray] = []
+        cnts: List[np.ndarray] = []
+        doc_len: List[int] = []
+        for i, text in enumerate(texts):
+            toks = tokenize(text) if text else []
+            doc_len.append(len(toks))
+            if not toks:
+                continue
+            tids = np.fromiter((vocab.setdefault(t, len(vocab)) for t in toks), dtype="int64", count=len(toks))
+            u, c = np.unique(tids, return_counts=True)
+            rows.append(u)
+            cols.append(np.full(len(u), i, dtype="int32"))
+            cnts.append(c.astype("float32"))
+        if rows:
+            term = np.concatenate(rows)
+            order = np.argsort(term, kind="stable")  # 용어별로 모으되 문서 순서는 유지
+            term, doc, tf = term[order], np.concatenate(cols)[order], np.concatenate(cnts)[order]
+        else:
+            term, doc, tf = (np.zeros(0, dtype="int64"), np.zeros(0, dtype="int32"), np.zeros(0, dtype="float32"))
+        offsets = np.zeros(len(vocab) + 1, dtype="int64")
+        np.cumsum(np.bincount(term, minlength=len(vocab)), out=offsets[1:])
+        return cls(vocab, offsets, doc, tf, np.asarray(doc_len, dtype="float32"), k1, b)
+
+    def save(self, path: str):
+        terms = np.array(sorted(self.vocab, key=self.vocab.get)) if self.vocab else np.zeros(0, dtype="<U1")
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, terms=terms, offsets=self.offsets, doc=self.doc, tf=self.tf, doc_len=self.doc_len,
+                 params=np.array([self.k1, self.b], dtype="float64"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as z:
+            vocab = {t: i for i, t in enumerate(z["terms"].tolist())}
+            k1, b = z["params"].tolist()
+            return cls(vocab, z["offsets"], z["doc"], z["tf"], z["doc_len"], k1, b)
+
+    # ---------- Search ----------
+    def search(self, query: str, top_k: int = 10, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """[(문서 id, BM25 점수), ...] 점수 내림차순. mask(위치별 bool) 가 있으면 허용 문서만"""
+        tids = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        if not tids or not len(self.doc_len):
+            return []
+        spans = [(int(self.offsets[t]), int(self.offsets[t + 1])) for t in tids]
+        docs = np.concatenate([self.doc[s:e] for s, e in spans])
+        tf = np.concatenate([self.tf[s:e] for s, e in spans])
+        idf = np.concatenate([np.full(e - s, self.idf[t], dtype="float32") for t, (s, e) in zip(tids, spans)])
+        contrib = idf * tf * (self.k1 + 1) / (tf + self._norm[docs])
+        scores = np.bincount(docs, weights=contrib, minlength=len(self.doc_len))
+        if mask is not None:
+            scores[:len(mask)] *= mask
+        hit = np.nonzero(scores)[0]
+        if len(hit) > top_k:
+            hit = hit[np.argpartition(-scores[hit], top_k - 1)[:top_k]]
+        hit = hit[np.argsort(-scores[hit], kind="stable")]
+        return [(int(i), float(scores[i])) for i in hit]
+
+    def coverage(self, query: str, text: str) -> float:
+        """질의 토큰 중 문서에 등장하는 비율(0~1)"""
+        q = set(tokenize(query))
+        if not q:
+            return 0.0
+        return len(q & set(tokenize(text))) / len(q)
+
+
+def build_bm25(docs: Iterable[Optional[Dict[str, Any]]], index_dir: str) -> BM25Index:
+    """docs(위치 = 벡터 id, tombstone 은 None) → index_dir/bm25.npz"""
+    bm = BM25Index.build((d["text"] if d is not None else None) for d in docs)
+    bm.save(os.path.join(index_dir, BM25_NAME))
+    return bm
+
+
+def rrf_fuse(ranked_lists: List[List[Any]], k: int = 60) -> List[Tuple[Any, float]]:
+    """Reciprocal Rank Fusion: score(d) = Σ 1 / (k + rank) (rank 는 1부터)"""
+    fused: Dict[Any, float] = {}
+    for lst in ranked_lists:
+        for rank, key in enumerate(lst, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: -kv[1])
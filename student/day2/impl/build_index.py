@@ -2,30 +2,114 @@
 """
 Day2 인덱싱 엔트리포인트
 - 목표: 코퍼스 생성 → 임베딩 → FAISS 저장 + docs.jsonl 저장
+- 증분 모드(--incremental): files.json 의 파일별 해시/벡터 id 로 변경분만 임베딩, 삭제분은 remove_ids
 """
 
-import os, argparse, numpy as np
-from typing import List
+import os, json, shutil, argparse, numpy as np
+from typing import List, Dict, Any, Optional
 
-from student.day2.impl.ingest import build_corpus, save_docs_jsonl
+from student.day2.impl.ingest import (save_docs_jsonl, discover_files, load_documents,
+                                      iter_documents, chunk_document, resolve_chunking)
+from student.day2.impl.chunker import CHUNKERS
 from student.day2.impl.embeddings import Embeddings
-from student.day2.impl.store import FaissStore  # 제공됨
+from student.day2.impl.store import (FaissStore, INDEX_TYPES, QUANTIZE, VECTORS_NAME, is_lossy_factory,
+                                     index_factory_string, recall_report, dimension_report)
+from student.day2.impl.manifest import write_manifest, read_manifest
+from student.day2.impl.stream_build import stream_build
+from student.day2.impl.parse_cache import file_sha256
+from student.day2.impl.dedup import dedup_corpus
+from student.day2.impl.bm25 import build_bm25
+from student.day2.impl.meta_columns import build_meta_columns
+from student.day2.impl.docstore import DocStore
+from student.day2.impl.sharded import shard_of, shard_dir, write_sharded_manifest
+from student.day2.impl.profiler import BuildProfiler
 
+STATE_NAME = "files.json"  # {path: {"sha256":..., "ids":[...]}}
 
-def build_index(paths: List[str], index_dir: str, model: str | None = None, batch_size: int = 128):
+
+def _read_state(index_dir: str) -> Dict[str, Any] | None:
+    p = os.path.join(index_dir, STATE_NAME)
+    if not os.path.exists(p):
+        return None
+    with open(p, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_state(index_dir: str, state: Dict[str, Any]):
+    p = os.path.join(index_dir, STATE_NAME)
+    with open(p + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(p + ".tmp", p)
+
+
+def _state_from_corpus(corpus: List[Dict[str, Any]], ids: np.ndarray) -> Dict[str, Any]:
+    state: Dict[str, Any] = {}
+    for item, vid in zip(corpus, ids.tolist()):
+        path = item["meta"]["path"]
+        if path not in state:
+            state[path] = {"sha256": file_sha256(path), "ids": []}
+        state[path]["ids"].append(vid)
+    return state
+
+
+def build_index(paths: List[str], index_dir: str, model: str | None = None, batch_size: int = 128,
+                workers: int = 1, tpm: int | None = None, cache_dir: str | None = None,
+                chunk_size: int | None = None, chunk_overlap: int | None = None, chunker: str = "token",
+                index_type: str = "flat", nlist: int | None = None, pq_m: int | None = None,
+                hnsw_m: int = 32, nprobe: int | None = None, ef_search: int | None = None,
+                report: bool = False, incremental: bool = False,
+                stream: bool = False, queue_size: int = 4,
+                parse_workers: int = 1, parse_timeout: float = 300.0,
+                dedup: bool = True, dedup_threshold: float = 0.85, bm25: bool = True,
+                shards: int = 1, shard_id: int | None = None,
+                quantize: str | None = None, rerank_factor: int = 4,
+                dimensions: int | None = None, dim_report: List[int] | None = None,
+                profile: bool = True, cprofile_dir: str | None = None):
     """
     절차:
-      1) corpus = build_corpus(paths)
+      1) corpus = build_corpus(paths, chunk_size, chunk_overlap, chunker=chunker)
+         - 단계별 측정을 위해 load_documents(파싱) → chunk_document(청크) 로 나눠 실행
          - [{"id":..., "text":..., "meta":{...}}, ...]
+         - chunker: token(기본, 구조 경계 + 토큰 예산 512/48) | char(글자 슬라이딩 윈도우 1200/200)
+      1-1) dedup=True: 정확 일치 + MinHash/LSH(Jaccard ≥ dedup_threshold) 중복 청크 제거
+         - 대표 청크만 임베딩/저장, 중복 청크 id 는 대표의 meta["aliases"] 에 기록
+         - 파일 단위 삭제와 맞지 않아 incremental / stream 모드에서는 적용하지 않음
       2) texts = [item["text"] for item in corpus]
-      3) emb = Embeddings(model=model, batch_size=batch_size)
+      3) emb = Embeddings(model=model, batch_size=batch_size, max_workers=workers, tpm=tpm, cache_dir=cache_dir)
          vecs = emb.encode(texts)  # (N, D) L2 정규화된 np.ndarray
+         - workers > 1 이면 배치 동시 요청, 처리량은 emb.last_stats 로 출력
+         - cache_dir(또는 DAY2_EMB_CACHE_DIR) 지정 시 변경 없는 청크는 API 호출 없이 캐시에서 로드
       4) index_path = os.path.join(index_dir, "faiss.index")
          docs_path  = os.path.join(index_dir, "docs.jsonl")
       5) store = FaissStore(dim=vecs.shape[1], index_path=index_path, docs_path=docs_path)
          store.add(vecs, corpus); store.save()
+         - index_type: flat(기본, 정확) | ivf | ivfpq | hnsw  → IVF/PQ 는 add 전에 샘플로 학습
+         - nprobe / ef_search 는 manifest 에 기록되어 조회 시 적용 (nprobe 미지정 시 default_nprobe(nlist))
+         - report=True 이면 Flat 대비 recall@10 / 지연시간 표 출력(nprobe·efSearch 스윕)
       6) save_docs_jsonl(corpus, docs_path)
+      7) manifest.json 기록(모델/차원/정규화/청크 파라미터/빌드 시각) → 조회 시 호환성 검사에 사용
+      8) files.json 기록(파일별 sha256 + 벡터 id)
+      9) bm25=True: docs 순서(= 벡터 id)로 BM25 희소 인덱스 bm25.npz 기록 → 조회 시 하이브리드 검색
+     10) meta.npz: 벡터별 path/type/date 컬럼 → 조회 시 필터를 검색 내부(IDSelector)로 전달
+      - incremental=True: 기존 인덱스가 같은 설정이고 삭제 가능(IDMap2/IVF)하면 update_index 로 변경분만 반영,
+        아니면 삭제 가능한 인덱스로 전체 재생성(flat → IDMap2,Flat)
+      - stream=True: 전체 재생성을 stream_build 로 수행(읽기/청크와 임베딩을 겹쳐 실행, 메모리 상한 고정)
+      - parse_workers > 1: PDF 등 파싱을 프로세스 풀에서 병렬 수행(파일별 parse_timeout, 실패 파일 건너뜀)
+      - dimensions: 임베딩 출력 차원 축소(text-embedding-3 Matryoshka). manifest 에 기록되어 조회 임베더도 같은 차원 사용
+        dim_report=[256, 512, ...] 이면 임베딩 결과를 앞 d 성분으로 잘라 차원별 recall@10 표 출력(API 재호출 없음)
+      - quantize: fp16 | int8 → 인덱스 벡터를 스칼라 양자화(메모리 1/2 · 1/4). 양자화/ivfpq 인덱스는
+        원본 float32 를 vectors.f32(mmap sidecar)로 함께 저장하고, 조회 시 top_k*rerank_factor 후보를 재순위
+        (rerank_factor <= 1 이거나, 실제 factory 가 무손실(벡터 수 부족으로 ivfpq → IVF-Flat 등)이면 sidecar 없음)
+      - shards > 1: 파일을 경로 해시로 나눠 index_dir/shard_NNN 에 샤드별로 위 절차 수행 후 상위 manifest 기록
+        (shard_id 지정 시 해당 샤드만 빌드 → 샤드를 여러 프로세스/머신에서 따로 빌드 가능)
+      - profile=True: 단계별 wall/CPU/읽은 바이트/청크 수/API 호출·재시도/최대 RSS 표 출력 +
+        index_dir/build_profile.json 기록 (stream/incremental 은 겹쳐 실행되는 구간을 한 단계로 기록)
+        cprofile_dir 지정 시 단계별 cProfile 덤프(<단계>.prof)
     """
+    if shards > 1:
+        opts = {k: v for k, v in locals().items() if k not in ("paths", "index_dir", "shards", "shard_id")}
+        return build_sharded(paths, index_dir, shards, shard_id, **opts)
+
     # ----------------------------------------------------------------------------
     # TODO[DAY2-I-01] 구현 지침
     #  - corpus = build_corpus(paths)
@@ -36,31 +120,281 @@ def build_index(paths: List[str], index_dir: str, model: str | None = None, batc
     #  - store = FaissStore(...); store.add(...); store.save()
     #  - save_docs_jsonl(corpus, docs_path)
     # ----------------------------------------------------------------------------
-    corpus = build_corpus(paths)                                   # 1) 경로들로부터 코퍼스 생성
+    emb = Embeddings(model=model, batch_size=batch_size,           # 0) 임베딩 인스턴스 준비
+                     max_workers=workers, tpm=tpm, cache_dir=cache_dir, dimensions=dimensions)
+    chunker, chunk_size, chunk_overlap = resolve_chunking(chunker, chunk_size, chunk_overlap)
+    index_factory_string(0, index_type, quantize=quantize)         #    설정 검증(임베딩 전에 실패)
+    if not (quantize or index_type == "ivfpq"):
+        rerank_factor = 0                                          #    무손실 인덱스는 재순위 불필요
+    prof = BuildProfiler(cprofile_dir=cprofile_dir)
+    if incremental:
+        if index_type == "hnsw":
+            raise ValueError("hnsw 인덱스는 벡터 삭제를 지원하지 않아 증분 모드를 쓸 수 없습니다.")
+        manifest = read_manifest(index_dir)
+        if (manifest and manifest.get("updatable") and _read_state(index_dir) is not None
+                and manifest.get("model") == emb.model and manifest.get("index_type") == index_type
+                and manifest.get("dimensions") == emb.dimensions
+                and manifest.get("chunker", "char") == chunker and manifest.get("quantize") == quantize
+                and (manifest.get("rerank") or {}).get("factor", 0)
+                    == (rerank_factor if is_lossy_factory(manifest.get("index_factory") or "") else 0)
+                and manifest.get("chunk_size") == chunk_size and manifest.get("chunk_overlap") == chunk_overlap):
+            with prof.stage("update") as st:
+                update_index(paths, index_dir, emb, manifest,
+                             parse_workers=parse_workers, parse_timeout=parse_timeout)
+                st.update(_emb_counters(emb.last_stats))
+            if profile:
+                _report_profile(prof, index_dir)
+            return
+        print("[build_index] 증분 갱신 불가(기존 인덱스 없음/설정 변경) → 전체 재생성")
+
+    if stream:
+        if report:
+            print("[build_index] --stream 모드에서는 recall 리포트를 생략합니다(벡터를 메모리에 보관하지 않음).")
+        with prof.stage("stream") as st:                           # 파싱·청크·임베딩·인덱스 추가가 겹쳐 실행
+            res = stream_build(paths, index_dir, emb, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                               chunker=chunker, index_type=index_type, nlist=nlist, pq_m=pq_m, hnsw_m=hnsw_m,
+                               nprobe=nprobe, ef_search=ef_search, id_mapped=incremental, queue_size=queue_size,
+                               quantize=quantize, rerank_factor=rerank_factor,
+                               parse_workers=parse_workers, parse_timeout=parse_timeout)
+            st.update(chunks=res["count"], **_emb_counters(res["stats"]))  # 배치 누적값
+        store = res["store"]
+        print("[build_index] stream:", res["stats"])
+        # 스트리밍 빌드는 docs 를 메모리에 두지 않으므로 기록된 docstore 를 다시 순회
+        if bm25:
+            with prof.stage("bm25"):
+                build_bm25(DocStore(store.docs_path) if res["count"] else [], index_dir)
+        with prof.stage("meta"):
+            build_meta_columns(DocStore(store.docs_path) if res["count"] else [], index_dir)
+        _drop_stale_vectors(index_dir, store)
+        write_manifest(index_dir, model=emb.model, dimensions=emb.dimensions, dim=res["dim"],
+                       normalized=True, metric="ip", count=res["count"],
+                       chunker=chunker, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                       index_type=index_type, index_factory=res["factory"],
+                       search_params=store.search_params,
+                       sparse="bm25" if bm25 else None,
+                       quantize=quantize, rerank={"factor": store.rerank_factor} if store.rerank_factor > 1 else None,
+                       updatable=store.supports_remove)
+        _write_state(index_dir, {p: {"sha256": file_sha256(p), "ids": ids}
+                                 for p, ids in res["ids_by_path"].items()})
+        if profile:
+            _report_profile(prof, index_dir)
+        return
+
+    with prof.stage("parse") as st:                                # 1) 경로들로부터 코퍼스 생성 (파싱 → 청크)
+        docs = load_documents(paths, workers=parse_workers, timeout=parse_timeout)
+        st.update(docs=len(docs), bytes_read=sum(os.path.getsize(d["path"]) for d in docs))
+    with prof.stage("chunk") as st:
+        corpus = [it for d in docs for it in chunk_document(d, chunk_size, chunk_overlap, chunker=chunker)]
+        st["chunks"] = len(corpus)
+    del docs
+    dedup_stats = None
+    if dedup and not incremental:                                  #    중복 청크 제거(대표만 임베딩)
+        with prof.stage("dedup") as st:
+            corpus, dedup_stats = dedup_corpus(corpus, threshold=dedup_threshold)
+            st["chunks"] = len(corpus)
+        print("[build_index] dedup:", dedup_stats)
     texts = [item["text"] for item in corpus]                      # 2) 인코딩 대상 텍스트 목록
-    emb = Embeddings(model=model, batch_size=batch_size)           # 3) 임베딩 인스턴스 준비
-    vecs: np.ndarray = emb.encode(texts)                           # 4) 텍스트 → 벡터 (N, D)
+    with prof.stage("embed") as st:
+        vecs: np.ndarray = emb.encode(texts)                       # 4) 텍스트 → 벡터 (N, D)
+        st.update(chunks=len(texts), **_emb_counters(emb.last_stats))
+    if emb.last_stats:
+        print("[build_index] embeddings:", emb.last_stats)
 
     os.makedirs(index_dir, exist_ok=True)                          # 5) 출력 디렉토리 생성
     index_path = os.path.join(index_dir, "faiss.index")            #    인덱스 파일 경로
     docs_path = os.path.join(index_dir, "docs.jsonl")              #    메타/문서 파일 경로
 
+    factory = index_factory_string(int(vecs.shape[1]), index_type, len(vecs),
+                                   nlist=nlist, pq_m=pq_m, hnsw_m=hnsw_m, quantize=quantize)
+    if incremental and index_type == "flat":
+        factory = "IDMap2," + factory                              #    id 기반 삭제 가능
     store = FaissStore(dim=vecs.shape[1],                          # 6) FAISS 스토어 준비
                        index_path=index_path,
-                       docs_path=docs_path)
-    store.add(vecs, corpus)                                        #    벡터와 문서 추가
-    store.save()                                                   #    인덱스 저장
+                       docs_path=docs_path,
+                       factory=factory)
+    with prof.stage("index") as st:
+        if rerank_factor > 1 and is_lossy_factory(factory):        #    재순위용 float32 sidecar (PQ/SQ 코덱일 때만)
+            store.attach_vectors(os.path.join(index_dir, VECTORS_NAME), rerank_factor, create=True)
+        ids = store.add(vecs, corpus)                              #    (학습 후) 벡터와 문서 추가
+        store.set_search_params(nprobe=nprobe, ef_search=ef_search)
+        st["chunks"] = len(ids)
+    with prof.stage("write_index"):
+        store.save_index()                                         #    인덱스 저장(faiss.write_index)
+    with prof.stage("write_docs"):
+        store.save_docs()                                          #    docs.bin/idx + docs.jsonl
+        save_docs_jsonl(corpus, docs_path)                         # 7) 문서 메타 저장(jsonl)
+    if dim_report and len(vecs):
+        print(f"[build_index] 차원별 recall (기준: {vecs.shape[1]}차원 Flat)")
+        for row in dimension_report(vecs, dim_report, top_k=10):
+            print("   ", row)
+    if report and (index_type != "flat" or quantize) and len(vecs):
+        sweep = [1, 4, 16, 64, 256] if index_type != "hnsw" else [16, 32, 64, 128, 256]
+        print(f"[build_index] {factory} vs Flat")
+        for row in recall_report(store, vecs, top_k=10, sweep=sweep):
+            print("   ", row)
 
-    save_docs_jsonl(corpus, docs_path)                             # 7) 문서 메타 저장(jsonl)
+    if bm25:
+        with prof.stage("bm25"):
+            build_bm25(corpus, index_dir)                          #    BM25 희소 인덱스
+    with prof.stage("meta"):
+        build_meta_columns(corpus, index_dir)                      #    필터용 메타 컬럼
+    # dedup 으로 실제 제거된 청크가 있으면 파일별 id 가 원본과 어긋나므로 증분 갱신 불가
+    deduped = bool(dedup_stats and (dedup_stats["exact"] or dedup_stats["near"]))
+    _drop_stale_vectors(index_dir, store)
+    write_manifest(index_dir, model=emb.model, dimensions=emb.dimensions, dim=int(vecs.shape[1]),  # 8) 매니페스트 기록
+                   normalized=True, metric="ip", count=len(corpus),
+                   chunker=chunker, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                   index_type=index_type, index_factory=factory,
+                   search_params=store.search_params,
+                   dedup=dict(dedup_stats, threshold=dedup_threshold) if dedup_stats else None,
+                   sparse="bm25" if bm25 else None,
+                   quantize=quantize, rerank={"factor": store.rerank_factor} if store.rerank_factor > 1 else None,
+                   updatable=store.supports_remove and not deduped)
+    _write_state(index_dir, _state_from_corpus(corpus, ids))      # 9) 파일별 해시/벡터 id
+    if profile:
+        _report_profile(prof, index_dir)                           # 10) 단계별 프로파일
     # ----------------------------------------------------------------------------
 
 
+def _drop_stale_vectors(index_dir: str, store: FaissStore):
+    """이번 빌드가 sidecar 를 쓰지 않으면 이전 빌드의 vectors.f32 삭제(디스크만 차지)"""
+    path = os.path.join(index_dir, VECTORS_NAME)
+    if store.rerank_factor <= 1 and os.path.exists(path):
+        os.remove(path)
+
+
+def _emb_counters(stats: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """임베딩 통계(emb.last_stats 또는 stream 누적 stats) → 프로파일 카운터"""
+    stats = stats or {}
+    return {k: stats[k] for k in ("api_calls", "retries", "rate_limited", "cache_hits") if k in stats}
+
+
+def _report_profile(prof: BuildProfiler, index_dir: str):
+    print("[build_index] 단계별 프로파일")
+    print(prof.table())
+    print("[build_index] 프로파일 저장:", prof.write(index_dir))
+
+
+def build_sharded(paths: List[str], index_dir: str, shards: int, shard_id: int | None = None, **opts):
+    """
+    파일을 shard_of(경로) 로 배정해 샤드별 build_index 실행 → 상위 manifest.json 에 샤드 목록 기록
+    - 배정된 파일이 없는 샤드는 기존 샤드 디렉토리를 삭제(파일이 모두 지워진 샤드가 옛 문서를 계속 반환하지 않도록)
+      → 상위 manifest 에는 count 0 으로 기록되어 조회 시 건너뜀
+    """
+    files = discover_files(paths)
+    targets = range(shards) if shard_id is None else [shard_id]
+    cprofile_dir = opts.pop("cprofile_dir", None)
+    for i in targets:
+        if not 0 <= i < shards:
+            raise ValueError(f"shard_id 는 0 ~ {shards - 1} 범위여야 합니다: {i}")
+        group = [fp for fp in files if shard_of(fp, shards) == i]
+        if not group:
+            sdir = shard_dir(index_dir, i)
+            if read_manifest(sdir) is not None:  # 이전 빌드가 남긴 샤드 → 제거
+                shutil.rmtree(sdir)
+                print(f"[build_index] shard {i}: 배정된 파일 없음 → 기존 샤드 삭제")
+            else:
+                print(f"[build_index] shard {i}: 배정된 파일 없음 → 건너뜀")
+            continue
+        print(f"[build_index] shard {i}: 파일 {len(group)}개")
+        build_index(group, shard_dir(index_dir, i), **opts,
+                    cprofile_dir=os.path.join(cprofile_dir, f"shard_{i:03d}") if cprofile_dir else None)
+    write_sharded_manifest(index_dir, shards)
+
+
+def update_index(paths: List[str], index_dir: str, emb: Embeddings, manifest: Dict[str, Any],
+                 parse_workers: int = 1, parse_timeout: float = 300.0):
+    """
+    증분 갱신
+      1) files.json 과 현재 파일의 sha256 비교 → 신규/변경/삭제 파일 분류
+      2) 변경/삭제 파일의 기존 벡터 id 를 remove_ids (docs 자리는 tombstone)
+      3) 신규/변경 파일만 로드·청크·임베딩 후 새 id 로 추가
+      4) 인덱스/docs/manifest/files.json 저장
+    """
+    index_path = os.path.join(index_dir, "faiss.index")
+    docs_path = os.path.join(index_dir, "docs.jsonl")
+    store = FaissStore.load(index_path, docs_path)
+    if manifest.get("rerank"):  # 새 벡터도 sidecar 에 이어 붙임
+        store.attach_vectors(os.path.join(index_dir, VECTORS_NAME), manifest["rerank"]["factor"])
+    state = _read_state(index_dir) or {}
+
+    current = {fp: file_sha256(fp) for fp in discover_files(paths)}
+    stale_ids: List[int] = []
+    changed: List[str] = []
+    for fp, h in current.items():
+        old = state.get(fp)
+        if old is not None and old["sha256"] == h:
+            continue
+        if old is not None:
+            stale_ids.extend(old["ids"])
+        changed.append(fp)
+    for fp in [fp for fp in state if fp not in current]:
+        stale_ids.extend(state.pop(fp)["ids"])
+
+    removed = store.remove(stale_ids)
+    items: List[Dict[str, Any]] = []
+    for fp in changed:
+        state.pop(fp, None)
+    for doc in iter_documents(changed, workers=parse_workers, timeout=parse_timeout):
+        items.extend(chunk_document(doc, manifest["chunk_size"], manifest["chunk_overlap"],
+                                    chunker=manifest.get("chunker", "char")))
+    if items:
+        vecs = emb.encode([it["text"] for it in items])
+        if emb.last_stats:
+            print("[build_index] embeddings:", emb.last_stats)
+        ids = store.add(vecs, items)
+        for path, entry in _state_from_corpus(items, ids).items():
+            state[path] = entry
+    print(f"[build_index] 증분 갱신: 변경/신규 파일 {len(changed)}개, 추가 청크 {len(items)}개, 삭제 벡터 {removed}개")
+
+    if not (changed or removed):
+        return
+    store.save()
+    if manifest.get("sparse") == "bm25":  # 삭제 자리(None)를 포함한 docs 순서 그대로 재구축
+        build_bm25(store.docs, index_dir)
+    build_meta_columns(store.docs, index_dir)
+    manifest = {k: v for k, v in manifest.items() if k not in ("version", "built_at")}
+    manifest["count"] = int(store.index.ntotal)
+    write_manifest(index_dir, **manifest)
+    _write_state(index_dir, state)
+
+
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--paths", nargs="+", required=True)
     ap.add_argument("--index_dir", default="indices/day2")
     ap.add_argument("--model", default=None)
     ap.add_argument("--batch_size", type=int, default=128)
+    ap.add_argument("--workers", type=int, default=1, help="동시 임베딩 배치 수")
+    ap.add_argument("--tpm", type=int, default=None, help="분당 토큰 한도(추정치)")
+    ap.add_argument("--chunker", default="token", choices=CHUNKERS, help="token: 구조/토큰 예산, char: 글자 윈도우")
+    ap.add_argument("--chunk_size", type=int, default=None, help="청크 크기(chunker 단위, 기본: token 512 / char 1200)")
+    ap.add_argument("--chunk_overlap", type=int, default=None, help="겹침(chunker 단위, 기본: token 48 / char 200)")
+    ap.add_argument("--index_type", default="flat", choices=INDEX_TYPES)
+    ap.add_argument("--nlist", type=int, default=None, help="IVF 클러스터 수(기본: 4*sqrt(N))")
+    ap.add_argument("--pq_m", type=int, default=None, help="PQ 서브벡터 수(dim 의 약수)")
+    ap.add_argument("--hnsw_m", type=int, default=32)
+    ap.add_argument("--nprobe", type=int, default=None)
+    ap.add_argument("--ef_search", type=int, default=None)
+    ap.add_argument("--report", action="store_true", help="Flat 대비 recall/지연시간 리포트")
+    ap.add_argument("--incremental", action="store_true", help="변경된 파일만 재임베딩(files.json 기준)")
+    ap.add_argument("--stream", action="store_true", help="스트리밍 파이프라인(메모리 상한 고정)")
+    ap.add_argument("--queue_size", type=int, default=4, help="스트리밍 큐에 대기할 최대 배치 수")
+    ap.add_argument("--parse_workers", type=int, default=1, help="문서 파싱 프로세스 수")
+    ap.add_argument("--parse_timeout", type=float, default=300.0, help="파일별 파싱 제한 시간(초)")
+    ap.add_argument("--parse_cache_dir", default=None, help="PDF 파싱 캐시 디렉토리(기본: DAY2_PARSE_CACHE_DIR)")
+    ap.add_argument("--no_dedup", action="store_true", help="중복 청크 제거 끄기")
+    ap.add_argument("--dedup_threshold", type=float, default=0.85, help="유사 중복 판정 Jaccard 임계값")
+    ap.add_argument("--no_bm25", action="store_true", help="BM25 희소 인덱스(bm25.npz) 생성 끄기")
+    ap.add_argument("--shards", type=int, default=1, help="샤드 수(파일 경로 해시로 분배)")
+    ap.add_argument("--shard_id", type=int, default=None, help="이 샤드만 빌드(미지정 시 전체)")
+    ap.add_argument("--quantize", default=None, choices=list(QUANTIZE), help="인덱스 벡터 스칼라 양자화")
+    ap.add_argument("--rerank_factor", type=int, default=4, help="양자화 인덱스 재순위 후보 배수(<=1 이면 끔)")
+    ap.add_argument("--dimensions", type=int, default=None, help="임베딩 출력 차원(text-embedding-3 축소 차원)")
+    ap.add_argument("--dim_report", type=int, nargs="+", default=None, help="차원별 recall 리포트 대상 차원 목록")
+    ap.add_argument("--cache_dir", default=None, help="임베딩 캐시 디렉토리(기본: DAY2_EMB_CACHE_DIR)")
+    ap.add_argument("--no_profile", action="store_true", help="단계별 프로파일 표/build_profile.json 끄기")
+    ap.add_argument("--cprofile_dir", default=None, help="단계별 cProfile 덤프 디렉토리(<단계>.prof)")
     args = ap.parse_args()
 
     # ----------------------------------------------------------------------------
@@ -69,5 +403,18 @@ if __name__ == "__main__":
     #  - build_index(args.paths, args.index_dir, args.model, args.batch_size)
     # ----------------------------------------------------------------------------
     os.makedirs(args.index_dir, exist_ok=True)                     # 출력 디렉토리 보장
-    build_index(args.paths, args.index_dir, args.model, args.batch_size)  # 인덱싱 파이프라인 실행
+    if args.parse_cache_dir:                                       # 파싱 워커 프로세스에도 전달되도록 환경변수로 설정
+        os.environ["DAY2_PARSE_CACHE_DIR"] = args.parse_cache_dir
+    build_index(args.paths, args.index_dir, args.model, args.batch_size,  # 인덱싱 파이프라인 실행
+                workers=args.workers, tpm=args.tpm, cache_dir=args.cache_dir,
+                chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap, chunker=args.chunker,
+                index_type=args.index_type, nlist=args.nlist, pq_m=args.pq_m, hnsw_m=args.hnsw_m,
+                nprobe=args.nprobe, ef_search=args.ef_search, report=args.report,
+                incremental=args.incremental, stream=args.stream, queue_size=args.queue_size,
+                parse_workers=args.parse_workers, parse_timeout=args.parse_timeout,
+                dedup=not args.no_dedup, dedup_threshold=args.dedup_threshold, bm25=not args.no_bm25,
+                shards=args.shards, shard_id=args.shard_id,
+                quantize=args.quantize, rerank_factor=args.rerank_factor,
+                dimensions=args.dimensions, dim_report=args.dim_report,
+                profile=not args.no_profile, cprofile_dir=args.cprofile_dir)
     # ----------------------------------------------------------------------------
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+토큰 예산 기반 구조 인식 청커
+- 경계 후보(제목 > 문단 > 문장 > 공백)를 미리 컴파일한 정규식 1회 순회로 수집
+- 글자별 토큰 비용을 numpy 누적합으로 계산 → 예산 한도 위치를 searchsorted 로 찾고,
+  그 안에서 가장 강한 경계(동률이면 가장 뒤)를 골라 자름 → 한국어 문장이 어절 중간에서 끊기지 않음
+- 겹침(overlap)은 문장 경계 단위로만 적용(글자 단위 중복 토큰을 임베딩하지 않도록)
+"""
+
+from __future__ import annotations
+import re
+from typing import List, Tuple
+import numpy as np
+
+CHUNKERS = ("token", "char")
+# chunker 별 (chunk_size, chunk_overlap) 기본값: token 은 모델 토큰, char 는 글자 수
+CHUNK_DEFAULTS = {"token": (512, 48), "char": (1200, 200)}
+
+# 경계 강도
+_HEADING, _PARA, _SENT, _SPACE = 3, 2, 1, 0
+
+# 하나의 정규식으로 모든 경계를 수집(lastgroup 으로 종류 구분). 위치 = 다음 청크의 시작 지점
+_BOUNDARY_RE = re.compile(
+    r"(?P<head>\n+(?=[ \t]*(?:#{1,6}[ \t]|제\s*\d+\s*[장절조관]|[0-9]{1,2}(?:\.[0-9]{1,2})*\.?[ \t]|[ⅠⅡⅢⅣⅤⅥⅦⅧⅨⅩ]+\.|[□■○●◆◇▶▷※][ \t])))"
+    r"|(?P<para>\n[ \t]*\n\s*)"
+    r"|(?P<sent>(?<=[.!?。？！…])[\"'”’)\]]*[ \t\n]+|\n)"
+    r"|(?P<space>[ \t]+)"
+)
+_LEVEL = {"head": _HEADING, "para": _PARA, "sent": _SENT, "space": _SPACE}
+
+
+def token_costs(text: str) -> np.ndarray:
+    """
+    글자별 근사 토큰 비용 (cl100k 계열 기준 대략치)
+    - 한글/CJK 글자: 1.0, 공백: 0, 그 외(영문/숫자/기호): 0.3 (영문 ≈ 4글자/토큰)
+    """
+    if not text:
+        return np.zeros(0, dtype="float32")
+    cp = np.frombuffer(text.encode("utf-32-le"), dtype="<u4")
+    cjk = ((cp >= 0xAC00) & (cp <= 0xD7A3)) | ((cp >= 0x3130) & (cp <= 0x318F)) | \
+          ((cp >= 0x4E00) & (cp <= 0x9FFF)) | ((cp >= 0x3040) & (cp <= 0x30FF))
+    space = (cp == 0x20) | (cp == 0x09) | (cp == 0x0A) | (cp == 0x0D)
+    return np.where(cjk, 1.0, np.where(space, 0.0, 0.3)).astype("float32")
+
+
+def count_tokens(text: str) -> int:
+    return int(np.ceil(token_costs(text).sum()))
+
+
+def _boundaries(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    pos, lvl = [], []
+    for m in _BOUNDARY_RE.finditer(text):
+        pos.append(m.end())
+        lvl.append(_LEVEL[m.lastgroup])
+    return np.asarray(pos, dtype="int64"), np.asarray(lvl, dtype="int64")
+
+
+def chunk_text_tokens(text: str, max_tokens: int = 512, overlap_tokens: int = 48,
+                      min_fill: float = 0.5) -> List[str]:
+    """
+    구조 경계를 지키며 max_tokens 이하로 분할
+    - min_fill: 청크가 예산의 이 비율 이상 찼을 때부터 경계 후보로 인정(너무 잘게 쪼개지지 않게)
+      단, 제목 경계는 예산의 1/4 이상이면 바로 끊음(섹션이 섞이지 않게)
+    - 경계가 하나도 없으면(긴 공백 없는 문자열) 예산 위치에서 강제로 자름
+    """
+    text = text or ""
+    max_tokens = max(1, int(max_tokens))
+    overlap_tokens = max(0, min(int(overlap_tokens), max_tokens // 2))
+    n = len(text)
+    if n == 0:
+        return [text]
+    cum = np.concatenate([[0.0], np.cumsum(token_costs(text), dtype="float64")])  # cum[i] = text[:i] 토큰
+    if cum[-1] <= max_tokens:
+        return [text.strip() or text]
+    pos, lvl = _boundaries(text)
+    bcum = cum[pos]
+    # 강도 우선, 같은 강도면 뒤쪽 → 단일 키로 argmax
+    key = lvl * (n + 1) + pos
+
+    chunks: List[str] = []
+    start = prev_end = 0
+    while start < n:
+        base = cum[start]
+        if cum[-1] - base <= max_tokens:
+            end = n
+        else:
+            hard = int(np.searchsorted(cum, base + max_tokens, side="right")) - 1  # 예산 내 마지막 위치
+            hard = max(hard, prev_end + 1)  # 겹침으로 되돌아가도 항상 전진
+            lo = int(np.searchsorted(pos, prev_end, side="right"))
+            hi = int(np.searchsorted(pos, hard, side="right"))
+            end = hard
+            if hi > lo:
+                filled = bcum[lo:hi] - base
+                ok = (filled >= max_tokens * min_fill) | ((lvl[lo:hi] == _HEADING) & (filled >= max_tokens * 0.25))
+                if ok.any():
+                    j = lo + int(np.argmax(np.where(ok, key[lo:hi], -1)))
+                else:
+                    j = hi - 1  # 예산을 채우는 경계가 없으면 가장 뒤 경계
+                end = int(pos[j])
+        piece = text[start:end].strip()
+        if piece:
+            chunks.append(piece)
+        if end >= n:
+            break
+        prev_end = nxt = end
+        if overlap_tokens:
+            # end 직전 overlap_tokens 이내의 문장 경계(이상) 중 가장 앞쪽에서 다음 청크 시작
+            lo = int(np.searchsorted(pos, start, side="right"))
+            hi = int(np.searchsorted(pos, end, side="left"))
+            cand = np.nonzero((lvl[lo:hi] >= _SENT) & (cum[end] - bcum[lo:hi] <= overlap_tokens))[0]
+            if len(cand):
+                nxt = int(pos[lo + cand[0]])
+        start = nxt if nxt > start else end
+    return chunks or [text]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 전 청크 중복 제거 (정확 일치 + MinHash/LSH 유사 중복)
+- 정확 일치: 공백 정규화한 텍스트의 sha1
+- 유사 중복: 글자 5-gram 셍글 → MinHash 서명(num_perm) → LSH 밴드 버킷으로 후보 추출 → 서명 일치율(≈Jaccard) ≥ threshold
+- 먼저 나온 청크가 대표(canonical). 중복 청크는 임베딩/저장하지 않고 대표의 meta["aliases"] 에 id 를 기록
+"""
+
+from __future__ import annotations
+import re, hashlib
+from typing import List, Dict, Any, Tuple, Optional
+import numpy as np
+
+_WS_RE = re.compile(r"\s+")
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+def normalize_text(text: str) -> str:
+    return _WS_RE.sub(" ", text or "").strip()
+
+
+def _shingle_hashes(text: str, k: int) -> np.ndarray:
+    """글자 k-gram 다항 해시(중복 제거, 값 < 2^31-1)"""
+    cp = np.frombuffer(text.encode("utf-32-le"), dtype="<u4").astype("uint64")
+    if len(cp) < k:
+        return np.zeros(0, dtype="uint64")
+    h = np.zeros(len(cp) - k + 1, dtype="uint64")
+    for j in range(k):
+        h = (h * np.uint64(1_000_003) + cp[j:len(cp) - k + 1 + j]) % _PRIME
+    return np.unique(h)
+
+
+class MinHashDeduper:
+    """
+    온라인 중복 판정기: add(id, text) 를 순서대로 호출하면 중복일 때 먼저 나온 대표 id 를 돌려줌
+    - bands * rows = num_perm. (bands=16, rows=8) 은 Jaccard ≈ 0.7 부근부터 후보로 잡힘
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 16,
+                 shingle: int = 5, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm 은 bands 의 배수여야 합니다.")
+        self.threshold = float(threshold)
+        self.bands, self.rows = bands, num_perm // bands
+        self.shingle = shingle
+        rng = np.random.default_rng(seed)
+        # 순열 근사: (a*h + b) mod 2^32 (a 홀수 → uint32 위 전단사). uint32 오버플로로 mod 연산 생략
+        self._a = rng.integers(0, 1 << 32, size=num_perm, dtype="uint64").astype("uint32") | np.uint32(1)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype="uint64").astype("uint32")
+        self._exact: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._sigs: List[np.ndarray] = []
+        self._ids: List[str] = []
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        h = _shingle_hashes(text, self.shingle).astype("uint32")
+        if not len(h):
+            return None  # 셍글보다 짧은 텍스트는 정확 일치만 검사
+        return (h[:, None] * self._a[None, :] + self._b[None, :]).min(axis=0)
+
+    def add(self, item_id: str, text: str) -> Tuple[Optional[str], str]:
+        """반환: (대표 id 또는 None, 판정 "new" | "exact" | "near")"""
+        norm = normalize_text(text)
+        key = hashlib.sha1(norm.encode("utf-8")).hexdigest()
+        if key in self._exact:
+            return self._exact[key], "exact"
+
+        sig = self.signature(norm)
+        if sig is None:
+            self._exact[key] = item_id
+            return None, "new"
+        bkeys = [(b, sig[b * self.rows:(b + 1) * self.rows].tobytes()) for b in range(self.bands)]
+        cands = sorted({c for bk in bkeys for c in self._buckets.get(bk, ())})
+        if cands:
+            agree = (np.stack([self._sigs[c] for c in cands]) == sig[None, :]).mean(axis=1)
+            best = int(np.argmax(agree))
+            if agree[best] >= self.threshold:
+                canon = self._ids[cands[best]]
+                self._exact[key] = canon  # 같은 텍스트가 다시 나오면 바로 대표로
+                return canon, "near"
+        self._exact[key] = item_id
+        slot = len(self._sigs)
+        self._sigs.append(sig)
+        self._ids.append(item_id)
+        for bk in bkeys:
+            self._buckets.setdefault(bk, []).append(slot)
+        return None, "new"
+
+
+def dedup_corpus(items: List[Dict[str, Any]], threshold: float = 0.85) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    코퍼스 중복 제거 → (대표 청크 목록, 통계)
+    - 대표 청크의 meta["aliases"] 에 중복 청크 id 목록을 기록(검색 결과에서 출처 복원용)
+    - 통계: {"chunks", "kept", "exact", "near"}
+    """
+    dd = MinHashDeduper(threshold=threshold)
+    kept: List[Dict[str, Any]] = []
+    by_id: Dict[str, Dict[str, Any]] = {}
+    stats = {"chunks": len(items), "kept": 0, "exact": 0, "near": 0}
+    for it in items:
+        canon, kind = dd.add(it["id"], it["text"])
+        if canon is None:
+            kept.append(it)
+            by_id[it["id"]] = it
+            continue
+        stats[kind] += 1
+        meta = by_id[canon].setdefault("meta", {})
+        meta.setdefault("aliases", []).append(it["id"])
+    stats["kept"] = len(kept)
+    return kept, stats
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+mmap 기반 문서 저장소 (docs.jsonl 대체용 읽기 경로)
+- docs.idx: 헤더(magic, version, count) + 고정폭 uint64 오프셋 테이블 (count+1 개)
+- docs.bin: 문서 레코드(JSON, utf-8)를 이어 붙인 blob
+- 로드는 O(1)(mmap 만 열기), 조회 시 요청된 레코드만 디코딩
+"""
+
+from __future__ import annotations
+import os, json, mmap, struct
+from typing import List, Dict, Any, Iterable
+import numpy as np
+
+_MAGIC = b"D2DS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIQ")  # magic, version, count
+
+
+def docstore_paths(docs_path: str):
+    """docs.jsonl 경로 기준 sidecar 경로 (docs.idx, docs.bin)"""
+    base = os.path.splitext(docs_path)[0]
+    return base + ".idx", base + ".bin"
+
+
+def write_docstore(items: Iterable[Dict[str, Any]], docs_path: str) -> int:
+    with DocStoreWriter(docs_path, jsonl=False) as w:
+        for it in items:
+            w.write(it)
+    return w.count
+
+
+class DocStoreWriter:
+    """
+    문서를 하나씩 append 하며 docs.bin(+선택: docs.jsonl) 을 기록하고, close 시 docs.idx 작성
+    - 메모리에는 오프셋(문서당 8바이트)만 유지 → 스트리밍 인덱싱용
+    """
+
+    def __init__(self, docs_path: str, jsonl: bool = True):
+        self.docs_path = docs_path
+        self.idx_path, self.bin_path = docstore_paths(docs_path)
+        self._fb = open(self.bin_path + ".tmp", "wb")
+        self._fj = open(docs_path + ".tmp", "w", encoding="utf-8") if jsonl else None
+        self._offsets = [0]
+
+    @property
+    def count(self) -> int:
+        return len(self._offsets) - 1
+
+    def write(self, item: Dict[str, Any]):
+        line = json.dumps(item, ensure_ascii=False)
+        rec = line.encode("utf-8")
+        self._fb.write(rec)
+        self._offsets.append(self._offsets[-1] + len(rec))
+        if self._fj is not None:
+            self._fj.write(line + "\n")
+
+    def close(self):
+        self._fb.close()
+        with open(self.idx_path + ".tmp", "wb") as fi:
+            fi.write(_HEADER.pack(_MAGIC, _VERSION, self.count))
+            fi.write(np.asarray(self._offsets, dtype="<u8").tobytes())
+        os.replace(self.bin_path + ".tmp", self.bin_path)
+        os.replace(self.idx_path + ".tmp", self.idx_path)
+        if self._fj is not None:
+            self._fj.close()
+            os.replace(self.docs_path + ".tmp", self.docs_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:  # 실패 시 기존 파일을 건드리지 않음
+            self._fb.close()
+            if self._fj is not None:
+                self._fj.close()
+
+
+class DocStore:
+    """list 처럼 len()/인덱싱 가능한 읽기 전용 문서 뷰"""
+
+    def __init__(self, docs_path: str):
+        idx_path, bin_path = docstore_paths(docs_path)
+        with open(idx_path, "rb") as f:
+            self._idx_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._idx_mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"지원하지 않는 docstore 형식입니다: {idx_path}")
+        self._count = int(count)
+        self._offsets = np.frombuffer(self._idx_mm, dtype="<u8", count=self._count + 1, offset=_HEADER.size)
+        self._bin_mm = None
+        if self._offsets[-1] > 0:
+            with open(bin_path, "rb") as f:
+                self._bin_mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def exists(docs_path: str) -> bool:
+        return all(os.path.exists(p) for p in docstore_paths(docs_path))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return json.loads(self._bin_mm[start:end].decode("utf-8"))
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 백엔드 (Embeddings 가 모델 이름으로 선택)
+- "text-embedding-3-small" 등 접두어 없는 이름 → OpenAI API (OPENAI_API_KEY 필요)
+- "local:<이름|경로>"  → sentence-transformers 모델을 CPU 에서 실행 (네트워크/과금 없음)
+- "onnx:<이름|경로>"   → sentence-transformers 의 ONNX Runtime 백엔드
+- "hash:<차원>"        → 결정적 해싱 임베딩(글자 n-gram feature hashing). 테스트/벤치마크용, 의존성 없음
+배치 분할, 동시 실행(max_workers), 재시도, 정규화, 캐시는 백엔드와 무관하게 Embeddings 가 담당
+"""
+
+from __future__ import annotations
+import os, hashlib
+from typing import List, Optional
+import numpy as np
+
+try:
+    from openai import OpenAI
+except ImportError:  # 로컬/해싱 백엔드만 쓸 때는 openai 없이도 동작
+    OpenAI = None
+
+
+class EmbeddingBackend:
+    """embed(batch) → (B, D) float32 (정규화 전). remote=True 면 tpm 제한/429 처리 대상"""
+    remote = False
+
+    def embed(self, batch: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class OpenAIBackend(EmbeddingBackend):
+    remote = True
+
+    def __init__(self, model: str, dimensions: Optional[int] = None):
+        key = os.getenv("OPENAI_API_KEY")
+        if OpenAI is None:
+            raise RuntimeError("openai 패키지가 필요합니다. `pip install openai` 후 재시도하세요.")
+        if not key:
+            raise RuntimeError("OPENAI_API_KEY 환경변수가 필요합니다.")
+        self.client = OpenAI(api_key=key)
+        self.model = model
+        self.dimensions = dimensions
+
+    def embed(self, batch: List[str]) -> np.ndarray:
+        kwargs = {"dimensions": self.dimensions} if self.dimensions else {}
+        resp = self.client.embeddings.create(model=self.model, input=list(batch), **kwargs)
+        data = sorted(resp.data, key=lambda d: d.index)  # index 기준 정렬로 입력 순서 보장
+        return np.asarray([d.embedding for d in data], dtype="float32")
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """
+    sentence-transformers 로컬 모델 (예: local:intfloat/multilingual-e5-small, onnx:sentence-transformers/...)
+    - dimensions 지정 시 truncate_dim 으로 Matryoshka 축소
+    - 내부 batch_size 는 Embeddings 배치 크기를 그대로 사용(배치 1개 = encode 1회)
+    """
+
+    def __init__(self, name: str, dimensions: Optional[int] = None, backend: str = "torch"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise RuntimeError("로컬 임베딩에는 sentence-transformers 가 필요합니다. "
+                               "`pip install sentence-transformers` (ONNX 는 `sentence-transformers[onnx]`)")
+        kwargs = {"device": "cpu", "truncate_dim": dimensions}
+        if backend != "torch":
+            kwargs["backend"] = backend
+        self.model = SentenceTransformer(name, **kwargs)
+
+    def embed(self, batch: List[str]) -> np.ndarray:
+        out = self.model.encode(list(batch), batch_size=len(batch), convert_to_numpy=True,
+                                normalize_embeddings=False, show_progress_bar=False)
+        return np.asarray(out, dtype="float32")
+
+
+class HashingBackend(EmbeddingBackend):
+    """
+    결정적 해싱 임베딩: 공백 정규화한 텍스트의 글자 1~3-gram 을 blake2b 로 (버킷, 부호) 에 사상해 누적
+    - 프로세스/머신이 달라도 같은 입력 → 같은 벡터 (Python hash 랜덤화와 무관)
+    - 표면형이 겹치는 문서끼리 코사인이 높아짐 → 파이프라인 테스트·벤치마크용 품질
+    """
+
+    def __init__(self, dim: int = 256, ngrams=(1, 2, 3)):
+        self.dim = int(dim)
+        self.ngrams = tuple(ngrams)
+
+    def _features(self, text: str) -> np.ndarray:
+        s = " ".join((text or "").lower().split())
+        grams = [s[i:i + n] for n in self.ngrams for i in range(max(0, len(s) - n + 1))]
+        if not grams:
+            return np.zeros(0, dtype="uint64")
+        digests = b"".join(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest() for g in grams)
+        return np.frombuffer(digests, dtype="<u8")
+
+    def embed(self, batch: List[str]) -> np.ndarray:
+        out = np.zeros((len(batch), self.dim), dtype="float32")
+        for r, text in enumerate(batch):
+            h = self._features(text)
+            if not len(h):
+                continue
+            buckets = (h % np.uint64(self.dim)).astype("int64")
+            signs = np.where((h >> np.uint64(63)) == 1, -1.0, 1.0).astype("float32")
+            np.add.at(out[r], buckets, signs)
+        return out
+
+
+def make_backend(model: str, dimensions: Optional[int] = None) -> EmbeddingBackend:
+    """모델 이름 접두어로 백엔드 선택"""
+    if model.startswith("hash:"):
+        spec = model.split(":", 1)[1]
+        return HashingBackend(dim=dimensions or (int(spec) if spec else 256))
+    if model.startswith("local:"):
+        return SentenceTransformerBackend(model.split(":", 1)[1], dimensions)
+    if model.startswith("onnx:"):
+        return SentenceTransformerBackend(model.split(":", 1)[1], dimensions, backend="onnx")
+    return OpenAIBackend(model, dimensions)
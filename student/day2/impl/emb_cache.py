@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 디스크 캐시 (content-addressed, 여러 프로세스 공유 가능)
+- 키: (namespace=모델명 등, sha256(text))
+- 저장(<cache_dir>/<namespace>/, 모두 append-only):
+  · entries.bin : 레코드 = sha256 32바이트 + D개 float32 → 적중 시 레코드의 키를 다시 확인(다른 벡터를 돌려주지 않음)
+  · keys.bin    : 레코드 순서대로 sha256 32바이트만 (열 때 이 파일만 읽어 키 → 슬롯 사전 구성)
+  · meta.json   : {"format": 2, "dim": D}
+- 쓰기(put_many)는 파일 잠금(lock) 안에서: 다른 프로세스가 덧붙인 키를 먼저 따라 읽고, 없는 키만 끝에 추가
+  (entries.bin 을 먼저 쓰고 keys.bin 을 나중에 쓰므로 keys.bin 에 보이는 키는 항상 벡터가 기록된 상태)
+- 읽기(get_many)는 파일을 쓰지 않음. 미적중 키가 있으면 keys.bin 의 늘어난 꼬리만 읽어 다른 프로세스 기록을 반영
+- 용량: entries.bin 이 max_bytes 를 넘으면 잠금 안에서 압축(이 프로세스가 최근 적중한 키 + 최근 추가분 우선 보존,
+  3/4 까지 줄임). 압축 후 파일이 교체되면 다른 프로세스는 inode 변화를 보고 다시 로드
+"""
+
+from __future__ import annotations
+import os, re, json, hashlib, threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_KEY_BYTES = 32
+_FORMAT = 2
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _safe_name(s: str) -> str:
+    return re.sub(r"[^0-9A-Za-z._@-]+", "_", s) or "default"
+
+
+@contextmanager
+def _file_lock(path: str):
+    """프로세스 간 배타 잠금(POSIX flock / Windows msvcrt)"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingCache:
+    def __init__(self, cache_dir: str, namespace: str, max_bytes: int = 1 << 30):
+        self.dir = os.path.join(cache_dir, _safe_name(namespace))
+        self.entries_path = os.path.join(self.dir, "entries.bin")
+        self.keys_path = os.path.join(self.dir, "keys.bin")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock_path = os.path.join(self.dir, "lock")
+        self.max_bytes = int(max_bytes)
+        self.dim: Optional[int] = None
+        self._index: Dict[bytes, int] = {}   # sha256 digest → 슬롯(레코드 번호)
+        self._keys_ino: Optional[int] = None  # keys.bin inode (압축으로 교체되면 전체 재로드)
+        self._keys_read = 0                   # keys.bin 에서 읽은 바이트 수
+        self._mm: Optional[np.memmap] = None
+        self._touched: Dict[bytes, None] = {}  # 이 프로세스에서 적중한 키(압축 시 우선 보존, 순서 = 최근순)
+        self._lock = threading.Lock()
+        self._load_meta()
+        self._refresh()
+
+    # ---------- 파일 동기화 ----------
+    def _load_meta(self):
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") == _FORMAT:
+                self.dim = int(meta["dim"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _dtype(self) -> np.dtype:
+        return np.dtype([("key", "u1", (_KEY_BYTES,)), ("vec", "<f4", (self.dim,))])
+
+    def _refresh(self):
+        """keys.bin 의 새로 덧붙은 키를 읽어 사전에 반영(교체됐으면 처음부터)"""
+        if self.dim is None:
+            self._load_meta()
+            if self.dim is None:
+                return
+        try:
+            st = os.stat(self.keys_path)
+        except FileNotFoundError:
+            self._index.clear()
+            self._keys_ino, self._keys_read, self._mm = None, 0, None
+            return
+        if st.st_ino != self._keys_ino or st.st_size < self._keys_read:
+            self._index.clear()
+            self._keys_ino, self._keys_read, self._mm = st.st_ino, 0, None
+        end = st.st_size - st.st_size % _KEY_BYTES  # 기록 중인 마지막 레코드는 다음에
+        if end <= self._keys_read:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_read)
+            buf = f.read(end - self._keys_read)
+        base = self._keys_read // _KEY_BYTES
+        for i in range(len(buf) // _KEY_BYTES):
+            self._index[buf[i * _KEY_BYTES:(i + 1) * _KEY_BYTES]] = base + i
+        self._keys_read += len(buf) - len(buf) % _KEY_BYTES
+
+    def _records(self, need: int) -> Optional[np.memmap]:
+        """entries.bin memmap (need 개 이상 레코드가 보이도록 필요 시 다시 매핑)"""
+        if self._mm is None or len(self._mm) < need:
+            try:
+                n = os.path.getsize(self.entries_path) // self._dtype().itemsize
+            except FileNotFoundError:
+                return None
+            self._mm = np.memmap(self.entries_path, dtype=self._dtype(), mode="r", shape=(n,)) if n else None
+        return self._mm
+
+    def flush(self):
+        """(호환용) 쓰기는 put_many 에서 바로 파일에 반영됨"""
+
+    # ---------- 조회/저장 ----------
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        out: Dict[str, np.ndarray] = {}
+        with self._lock:
+            digests = {k: bytes.fromhex(k) for k in keys}
+            if any(d not in self._index for d in digests.values()):
+                self._refresh()  # 다른 프로세스가 추가한 키 반영(꼬리만 읽음)
+            slots = {k: self._index[d] for k, d in digests.items() if d in self._index}
+            if not slots:
+                return out
+            mm = self._records(max(slots.values()) + 1)
+            if mm is None:
+                return out
+            for k, slot in slots.items():
+                if slot >= len(mm):
+                    continue
+                rec = mm[slot]
+                d = digests[k]
+                if rec["key"].tobytes() != d:  # 슬롯/키 불일치(압축 직후 등) → 미적중 처리
+                    continue
+                out[k] = np.array(rec["vec"], dtype="float32")
+                self._touched.pop(d, None)
+                self._touched[d] = None
+        return out
+
+    def put_many(self, keys: List[str], vecs: np.ndarray):
+        if not len(keys):
+            return
+        vecs = np.asarray(vecs, dtype="float32")
+        with self._lock:
+            os.makedirs(self.dir, exist_ok=True)
+            with _file_lock(self.lock_path):
+                self._refresh()
+                if self.dim is None:
+                    self.dim = int(vecs.shape[1])
+                    tmp = self.meta_path + ".tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump({"format": _FORMAT, "dim": self.dim}, f)
+                    os.replace(tmp, self.meta_path)
+                    self._refresh()
+                if vecs.shape[1] != self.dim:
+                    return  # 차원이 다른 벡터는 캐시하지 않음(네임스페이스 분리 전제)
+                new: Dict[bytes, np.ndarray] = {}
+                for k, v in zip(keys, vecs):
+                    d = bytes.fromhex(k)
+                    if d not in self._index:
+                        new[d] = v
+                if not new:
+                    return
+                self._append(new)
+                if os.path.getsize(self.entries_path) > self.max_bytes:
+                    self._compact()
+
+    def _append(self, new: Dict[bytes, np.ndarray]):
+        """잠금 안에서 호출: 레코드를 entries.bin → keys.bin 순서로 덧붙임"""
+        dt = self._dtype()
+        size = os.path.getsize(self.entries_path) if os.path.exists(self.entries_path) else 0
+        base = size // dt.itemsize
+        if size % dt.itemsize:  # 중단된 쓰기의 잔여 바이트 정리
+            with open(self.entries_path, "r+b") as f:
+                f.truncate(base * dt.itemsize)
+        if os.path.exists(self.keys_path) and os.path.getsize(self.keys_path) % _KEY_BYTES:
+            with open(self.keys_path, "r+b") as f:
+                f.truncate(self._keys_read)
+        n_keys = self._keys_read // _KEY_BYTES
+        if n_keys != base:  # keys.bin 이 덜 기록된 채 중단된 경우 → 키 기준으로 맞춤
+            with open(self.entries_path, "r+b") as f:
+                f.truncate(n_keys * dt.itemsize)
+            base = n_keys
+        recs = np.zeros(len(new), dtype=dt)
+        recs["key"] = np.frombuffer(b"".join(new), dtype="u1").reshape(len(new), _KEY_BYTES)
+        recs["vec"] = np.stack(list(new.values()))
+        with open(self.entries_path, "ab") as f:
+            f.write(recs.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.keys_path, "ab") as f:
+            f.write(b"".join(new))
+        self._refresh()
+
+    def _compact(self):
+        """잠금 안에서 호출: 최근 적중 키 + 최근 추가분을 3/4 용량까지 남기고 파일 교체"""
+        dt = self._dtype()
+        keep_n = max(1, int(self.max_bytes * 0.75) // dt.itemsize)
+        order = list(reversed([d for d in self._touched if d in self._index]))  # 최근 적중 우선
+        seen = set(order)
+        order += [d for d, _ in sorted(self._index.items(), key=lambda kv: -kv[1]) if d not in seen]
+        keep = sorted(order[:keep_n], key=self._index.get)  # 원래 추가 순서 유지
+        mm = self._records(len(self._index))
+        recs = np.array(mm[[self._index[d] for d in keep]]) if keep else np.zeros(0, dtype=dt)
+        del mm
+        self._mm = None  # 교체 전에 매핑 해제(Windows 는 매핑된 파일을 교체할 수 없음)
+        for path, data in ((self.entries_path, recs.tobytes()), (self.keys_path, b"".join(keep))):
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        kept = set(keep)
+        self._touched = {d: None for d in self._touched if d in kept}
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._index)
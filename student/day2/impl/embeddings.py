@@ -1,22 +1,36 @@
 # -*- coding: utf-8 -*-
 """
-OpenAI 임베딩 래퍼
-- 요구사항: 배치 인코딩, 재시도(backoff), L2 정규화
+임베딩 래퍼 (기본 OpenAI, 모델 이름 접두어로 로컬/해싱 백엔드 선택 → emb_backends)
+- 요구사항: 배치 인코딩(배치당 API 1회), 재시도(backoff), L2 정규화
+- 선택: max_workers > 1 이면 스레드풀로 N개 배치를 동시에 요청(in-flight)
+        429 응답 시 서버 힌트(retry-after 등)만큼 모든 워커가 함께 대기, tpm 지정 시 토큰 예산 준수
+- 선택: cache_dir(또는 환경변수 DAY2_EMB_CACHE_DIR) 지정 시 (모델, sha256(text)) 디스크 캐시 사용
+- 선택: dimensions 지정 시 text-embedding-3 계열의 축소 차원(Matryoshka) 출력 요청
 """
 
-import os, time
-from typing import List
+import os, re, time, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 import numpy as np
 # from httpx import ReadTimeout  # 선택: 재시도 구분용
-from openai import OpenAI
+
+from .emb_cache import EmbeddingCache, text_key
+from .emb_backends import make_backend
 
 
 class Embeddings:
-    def __init__(self, model: str | None = None, batch_size: int = 128, max_retries: int = 4):
+    def __init__(self, model: str | None = None, batch_size: int = 128, max_retries: int = 4,
+                 max_workers: int = 1, tpm: Optional[int] = None,
+                 cache_dir: Optional[str] = None, cache_max_mb: int = 1024,
+                 dimensions: Optional[int] = None):
         """
         - self.model 기본값: "text-embedding-3-small" 권장
         - self.batch_size, self.max_retries 저장
-        - OpenAI 클라이언트 생성 (키는 환경변수 OPENAI_API_KEY)
+        - max_workers: 동시에 요청할 배치 수(1이면 순차)
+        - tpm: 분당 토큰 한도(추정치 기준). None이면 429 힌트에만 의존
+        - cache_dir: 임베딩 캐시 디렉토리(기본: 환경변수 DAY2_EMB_CACHE_DIR, 없으면 캐시 미사용)
+        - dimensions: 출력 차원(None 이면 모델 기본 차원). 빌드/조회가 같은 값을 써야 함(manifest 에 기록)
+        - 백엔드 생성: model 이 "local:" / "onnx:" / "hash:" 로 시작하면 로컬, 아니면 OpenAI(키는 OPENAI_API_KEY)
         """
         # ----------------------------------------------------------------------------
         # TODO[DAY2-E-01] 구현 지침
@@ -27,65 +41,197 @@ class Embeddings:
         self.model = model or "text-embedding-3-small"
         self.batch_size = int(batch_size)
         self.max_retries = int(max_retries)
-        key = os.getenv("OPENAI_API_KEY")
-        if OpenAI is None:
-            raise RuntimeError("openai 패키지가 필요합니다. `pip install openai` 후 재시도하세요.")
-        if not key:
-            raise RuntimeError("OPENAI_API_KEY 환경변수가 필요합니다.")
-        self.client = OpenAI(api_key=key)
+        self.max_workers = max(1, int(max_workers))
+        self._stats_lock = threading.Lock()
+        self.last_stats: Dict[str, Any] = {}
+        self.dimensions = int(dimensions) if dimensions else None
+        cache_dir = cache_dir or os.getenv("DAY2_EMB_CACHE_DIR")
+        namespace = f"{self.model}@{self.dimensions}" if self.dimensions else self.model  # 차원별로 캐시 분리
+        self.cache = EmbeddingCache(cache_dir, namespace, cache_max_mb << 20) if cache_dir else None
+        self.backend = make_backend(self.model, self.dimensions)
+        self._limiter = _RateLimiter(tpm if self.backend.remote else None)  # 로컬 백엔드는 토큰 한도 없음
 
     def _embed_once(self, text: str) -> np.ndarray:
         """
         단일 텍스트 임베딩 호출 → np.ndarray(float32) + L2 정규화
         - 예외 발생 시 상위 encode에서 재시도하도록 예외를 그대로 올려보냄
         """
-        # ----------------------------------------------------------------------------
-        # TODO[DAY2-E-02] 구현 지침
-        #  - resp = self.client.embeddings.create(model=self.model, input=text)
-        #  - vec = np.array(resp.data[0].embedding, dtype="float32")
-        #  - norm = np.linalg.norm(vec) + 1e-12; vec = vec / norm
-        #  - return vec
-        # ----------------------------------------------------------------------------
-        resp = self.client.embeddings.create(model=self.model, input=text)
-        vec = np.array(resp.data[0].embedding, dtype="float32")
-        norm = np.linalg.norm(vec) + 1e-12
-        vec = vec / norm
-        return vec
+        return self._embed_batch([text])[0]
+
+    def _embed_batch(self, batch: List[str]) -> np.ndarray:
+        """
+        배치 단위 임베딩 호출(요청 1회) → (B, D) float32 + 행 단위 L2 정규화
+        - OpenAI 백엔드는 응답 data를 index 필드 기준으로 정렬해 입력 순서를 보장
+        - 예외는 그대로 올려보내 encode에서 배치 단위로 재시도
+        """
+        return _l2_normalize(self.backend.embed(batch))
 
     def encode(self, texts: List[str]) -> np.ndarray:
         """
         배치 인코딩 + 재시도(backoff). 최종 shape = (N, D)
+        - 캐시가 있으면 적중분은 API 호출 없이 채우고, 미적중(중복 제거)분만 요청 후 캐시에 기록
+        - batch_size 개씩 묶어 embeddings.create(input=[...]) 1회 호출
+        - max_workers > 1 이면 배치들을 스레드풀에서 동시에 처리(결과 순서는 입력 순서 유지)
+        - 처리량/재시도/캐시 통계는 self.last_stats 에 기록
         - 비어 있으면 (0, D) 반환. D는 1536 등 모델 차원 (미정이면 1536 가정 가능)
         """
-        # ----------------------------------------------------------------------------
-        # TODO[DAY2-E-03] 구현 지침
-        #  - if not texts: return np.zeros((0, 1536), dtype="float32")
-        #  - out = []
-        #  - for start in range(0, len(texts), self.batch_size):
-        #       batch = texts[start:start+self.batch_size]
-        #       for each in batch:
-        #          for attempt in range(self.max_retries):
-        #             try:
-        #                out.append(self._embed_once(each)); break
-        #             except Exception as e:
-        #                time.sleep(0.5 * (2 ** attempt))
-        #                if attempt == self.max_retries - 1: raise
-        #  - return np.vstack(out)
-        # ----------------------------------------------------------------------------
         if not texts:
-            return np.zeros((0, 1536), dtype="float32")
-
-        out = []
-        for start in range(0, len(texts), self.batch_size):
-            batch = texts[start:start + self.batch_size]
-            for each in batch:
-                for attempt in range(self.max_retries):
-                    try:
-                        out.append(self._embed_once(each))
-                        break
-                    except Exception:
-                        # 지수 백오프
-                        time.sleep(0.5 * (2 ** attempt))
-                        if attempt == self.max_retries - 1:
-                            raise
+            return np.zeros((0, self.dimensions or 1536), dtype="float32")
+        if self.cache is None:
+            return self._encode_uncached(texts)
+
+        keys = [text_key(t) for t in texts]
+        found = self.cache.get_many(keys)
+        todo: Dict[str, str] = {}
+        for k, t in zip(keys, texts):
+            if k not in found:
+                todo.setdefault(k, t)
+        if todo:
+            fresh = self._encode_uncached(list(todo.values()))
+            self.cache.put_many(list(todo.keys()), fresh)  # 새 항목만 덧붙임(적중은 파일을 쓰지 않음)
+            found.update(zip(todo.keys(), fresh))
+        else:
+            self.last_stats = {"texts": len(texts), "batches": 0, "api_calls": 0}
+        self.last_stats["texts"] = len(texts)
+        self.last_stats["cache_hits"] = len(texts) - sum(1 for k in keys if k in todo)
+        self.last_stats["cache_misses"] = len(todo)
+        return np.vstack([found[k] for k in keys]).astype("float32", copy=False)
+
+    def _encode_uncached(self, texts: List[str]) -> np.ndarray:
+        batches = [texts[s:s + self.batch_size] for s in range(0, len(texts), self.batch_size)]
+        self.last_stats = {"texts": len(texts), "batches": len(batches), "api_calls": 0,
+                           "retries": 0, "rate_limited": 0, "workers": self.max_workers}
+        t0 = time.perf_counter()
+        if self.max_workers == 1 or len(batches) == 1:
+            out = [self._embed_with_retry(b) for b in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+                out = list(ex.map(self._embed_with_retry, batches))
+        elapsed = time.perf_counter() - t0
+        self.last_stats["seconds"] = round(elapsed, 3)
+        self.last_stats["texts_per_sec"] = round(len(texts) / elapsed, 1) if elapsed > 0 else 0.0
         return np.vstack(out)
+
+    def _embed_with_retry(self, batch: List[str]) -> np.ndarray:
+        """
+        배치 1개를 재시도 포함 처리
+        - 429: 서버 힌트(retry-after-ms / retry-after / x-ratelimit-reset-*) 만큼 전체 워커 일시정지
+        - 그 외 오류: 0.5 * 2**attempt 지수 백오프
+        """
+        est_tokens = _estimate_tokens(batch)
+        for attempt in range(self.max_retries):
+            self._limiter.acquire(est_tokens)
+            try:
+                mat = self._embed_batch(batch)
+                self._bump("api_calls")
+                return mat
+            except Exception as e:
+                self._bump("api_calls")
+                if attempt == self.max_retries - 1:
+                    raise
+                self._bump("retries")
+                limited = _is_rate_limited(e)
+                wait = _retry_after_seconds(e) if limited else None
+                if wait is None:
+                    wait = 0.5 * (2 ** attempt)  # 지수 백오프
+                if limited:
+                    self._bump("rate_limited")
+                    self._limiter.pause(wait)
+                time.sleep(wait)
+
+    def _bump(self, key: str):
+        with self._stats_lock:
+            self.last_stats[key] = self.last_stats.get(key, 0) + 1
+
+
+def _l2_normalize(mat: np.ndarray) -> np.ndarray:
+    """(B, D) 행렬을 행 단위로 한 번에 L2 정규화"""
+    norms = np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12
+    return (mat / norms).astype("float32", copy=False)
+
+
+def truncate_dims(mat: np.ndarray, dim: int) -> np.ndarray:
+    """Matryoshka 축소: 앞 dim 개 성분만 남기고 재정규화 (API 의 dimensions 파라미터와 같은 결과)"""
+    return _l2_normalize(np.ascontiguousarray(mat[:, :dim], dtype="float32"))
+
+
+def _estimate_tokens(batch: List[str]) -> int:
+    """토큰 수 근사치(문자 수 / 2, 한글 비중이 높은 코퍼스 기준 보수적으로)"""
+    return sum(len(t) for t in batch) // 2 + len(batch)
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    return getattr(e, "status_code", None) == 429 or type(e).__name__ == "RateLimitError"
+
+
+_DURATION_RE = re.compile(r"(?:(\d+(?:\.\d+)?)m(?!s))?(?:(\d+(?:\.\d+)?)s)?(?:(\d+(?:\.\d+)?)ms)?$")
+
+
+def _parse_duration(v: str) -> Optional[float]:
+    """'1.5', '20ms', '6m0s', '1.2s' 형태를 초 단위로 변환"""
+    v = (v or "").strip()
+    if not v:
+        return None
+    try:
+        return float(v)
+    except ValueError:
+        pass
+    m = _DURATION_RE.match(v)
+    if not m or not any(m.groups()):
+        return None
+    mins, secs, ms = (float(g) if g else 0.0 for g in m.groups())
+    return mins * 60 + secs + ms / 1000
+
+
+def _retry_after_seconds(e: Exception) -> Optional[float]:
+    """429 예외의 응답 헤더에서 서버 대기 힌트 추출(없으면 None)"""
+    resp = getattr(e, "response", None)
+    headers = getattr(resp, "headers", None)
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000
+        except ValueError:
+            pass
+    for key in ("retry-after", "x-ratelimit-reset-tokens", "x-ratelimit-reset-requests"):
+        sec = _parse_duration(headers.get(key, ""))
+        if sec is not None:
+            return sec
+    return None
+
+
+class _RateLimiter:
+    """
+    워커 간 공유되는 간단한 레이트리미터
+    - tpm: 60초 슬라이딩 윈도우 토큰 예산(추정치). None이면 예산 제한 없음
+    - pause(sec): 429 발생 시 모든 워커가 sec 동안 새 요청을 보내지 않도록 함
+    """
+
+    def __init__(self, tpm: Optional[int] = None):
+        self.tpm = int(tpm) if tpm else None
+        self._lock = threading.Lock()
+        self._events: List[tuple] = []  # (timestamp, tokens)
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens: int):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._paused_until - now
+                if wait <= 0 and self.tpm:
+                    self._events = [(t, n) for t, n in self._events if now - t < 60.0]
+                    used = sum(n for _, n in self._events)
+                    # 단일 요청이 예산보다 크면 윈도우가 빌 때까지 기다렸다가 보냄
+                    if used and used + tokens > self.tpm:
+                        wait = self._events[0][0] + 60.0 - now
+                if wait <= 0:
+                    if self.tpm:
+                        self._events.append((now, tokens))
+                    return
+            time.sleep(min(wait, 1.0))
@@ -1,12 +1,22 @@
 # -*- coding: utf-8 -*-
 """
 인덱싱 입력 데이터 로딩/정제/청크
+- 파싱 병렬화: workers > 1 이면 프로세스 풀에서 파일별로 파싱(파일별 타임아웃, 실패 파일은 건너뜀)
+- PDF 파싱 결과는 DAY2_PARSE_CACHE_DIR 지정 시 parse_cache 에 캐시(변경 없는 파일은 재추출 생략)
+- 청크: 기본은 chunker.chunk_text_tokens(제목/문단/문장 경계 + 토큰 예산), chunker="char" 면 기존 chunk_text
 """
 
-import re, json
-from typing import List, Dict, Any
+import re, sys, json, time
+import multiprocessing as mp
+from collections import deque
+from typing import List, Dict, Any, Iterator, Tuple, Optional
 from pathlib import Path
 
+from .parse_cache import cached_parse
+from .chunker import CHUNKERS, CHUNK_DEFAULTS, chunk_text_tokens
+
+PDF_PARSER_VERSION = "ingest-pypdf-1"  # read_pdf_file/clean_text 로직 변경 시 올려서 캐시 무효화
+
 
 def read_text_file(path: str) -> str:
     """
@@ -90,9 +100,10 @@ def chunk_text(text: str, chunk_size: int = 1200, chunk_overlap: int = 200) -> L
     return chunks
 
 
-def load_documents(paths_or_dir: List[str]) -> List[Dict[str, Any]]:
+def load_documents(paths_or_dir: List[str], workers: int = 1, timeout: float = 300.0) -> List[Dict[str, Any]]:
     """
     입력 경로(디렉토리/파일)에서 txt/md/pdf 수집 → [{"path":..., "text":...}, ...]
+    - workers > 1 이면 iter_documents 의 프로세스 풀 경로 사용(완료 순서로 반환)
     """
     # ----------------------------------------------------------------------------
     # TODO[DAY2-G-05] 구현 지침
@@ -111,6 +122,86 @@ def load_documents(paths_or_dir: List[str]) -> List[Dict[str, Any]]:
     #       txt = clean_text(raw); docs.append({"path":fp,"text":txt})
     #  - return docs
     # ----------------------------------------------------------------------------
+    return list(iter_documents(paths_or_dir, workers=workers, timeout=timeout))
+
+
+def _load_document_safe(fp: str) -> Tuple[str, Optional[Dict[str, Any]], str]:
+    """워커 프로세스용: 예외를 결과로 돌려 손상 파일 1개가 전체 작업을 멈추지 않도록 함"""
+    try:
+        return fp, load_document(fp), ""
+    except Exception as e:
+        return fp, None, f"{type(e).__name__}: {e}"
+
+
+def _pool_context():
+    """
+    파싱 풀 시작 방식: Linux 는 forkserver, 그 외는 spawn
+    - stream 모드에서는 이 제너레이터가 생산자 스레드 안에서 돌기 때문에 fork 로 풀을 만들면 이미 여러 스레드가
+      있는 프로세스를 fork 하게 됨(잠금 상태 복제 위험, Python 3.12+ DeprecationWarning). 시간 초과 후 재시작도 동일
+    """
+    return mp.get_context("forkserver" if sys.platform.startswith("linux") else "spawn")
+
+
+def iter_documents(paths_or_dir: List[str], workers: int = 1, timeout: float = 300.0) -> Iterator[Dict[str, Any]]:
+    """
+    문서를 하나씩 흘려보내는 로더
+    - workers <= 1: 순차 파싱(입력 순서)
+    - workers > 1 : 프로세스 풀에 최대 workers 개만 동시에 맡기고 완료 순서대로 반환
+      · 파일별 timeout 초과 시 해당 파일은 건너뛰고, 멈춘 워커를 정리하기 위해 풀을 재시작
+        (함께 진행 중이던 다른 파일은 다시 제출)
+      · 파싱 예외/워커 크래시도 해당 파일만 건너뜀
+      · 풀은 _pool_context()(forkserver/spawn)로 생성 — 호출 스레드와 무관하게 안전
+    """
+    files = discover_files(paths_or_dir)
+    if workers <= 1:
+        for fp in files:
+            _, doc, err = _load_document_safe(fp)
+            if err:
+                print(f"[ingest] 파싱 실패, 건너뜀: {fp} ({err})")
+            elif doc is not None:
+                yield doc
+        return
+
+    pending = deque(files)
+    inflight: Dict[str, Tuple[Any, float]] = {}  # fp → (AsyncResult, deadline)
+    ctx = _pool_context()
+    pool = ctx.Pool(workers)
+    try:
+        while pending or inflight:
+            while pending and len(inflight) < workers:
+                fp = pending.popleft()
+                inflight[fp] = (pool.apply_async(_load_document_safe, (fp,)), time.monotonic() + timeout)
+            progressed = False
+            for fp in [fp for fp, (r, _) in inflight.items() if r.ready()]:
+                r, _ = inflight.pop(fp)
+                progressed = True
+                try:
+                    _, doc, err = r.get()
+                except Exception as e:
+                    doc, err = None, f"{type(e).__name__}: {e}"
+                if err:
+                    print(f"[ingest] 파싱 실패, 건너뜀: {fp} ({err})")
+                elif doc is not None:
+                    yield doc
+            now = time.monotonic()
+            expired = [fp for fp, (_, deadline) in inflight.items() if now > deadline]
+            if expired:
+                for fp in expired:
+                    inflight.pop(fp)
+                    print(f"[ingest] 파싱 시간 초과({timeout}s), 건너뜀: {fp}")
+                pool.terminate()
+                pool = ctx.Pool(workers)
+                pending.extendleft(reversed(list(inflight)))
+                inflight.clear()
+                progressed = True
+            if not progressed:
+                time.sleep(0.01)
+    finally:
+        pool.terminate()
+
+
+def discover_files(paths_or_dir: List[str]) -> List[str]:
+    """입력 경로(디렉토리/파일) → 파일 경로 목록 (디렉토리는 txt/md/pdf 재귀 탐색)"""
     files: List[str] = []
     for p in paths_or_dir:
         pp = Path(p)
@@ -119,25 +210,31 @@ def load_documents(paths_or_dir: List[str]) -> List[Dict[str, Any]]:
                 files.extend([str(x) for x in pp.rglob(ext)])
         else:
             files.append(str(pp))
+    return files
 
-    docs: List[Dict[str, Any]] = []
-    for fp in files:
-        ext = fp.lower().split(".")[-1]
-        if ext in ("txt", "md"):
-            raw = read_text_file(fp)
-        elif ext == "pdf":
-            raw = read_pdf_file(fp)
-        else:
-            continue
-        txt = clean_text(raw)
-        docs.append({"path": fp, "text": txt})
-    return docs
+
+def load_document(fp: str) -> Dict[str, Any] | None:
+    """파일 1개 로드+정제 → {"path":..., "text":...} (지원하지 않는 확장자는 None)"""
+    ext = fp.lower().split(".")[-1]
+    if ext in ("txt", "md"):
+        return {"path": fp, "text": clean_text(read_text_file(fp))}
+    if ext == "pdf":
+        parsed = cached_parse(fp, PDF_PARSER_VERSION, _parse_pdf)
+        return {"path": fp, "text": parsed["text"]}
+    return None
+
+
+def _parse_pdf(fp: str) -> Dict[str, Any]:
+    return {"text": clean_text(read_pdf_file(fp)), "tables": []}
 
 
-def build_corpus(paths_or_dir: List[str]) -> List[Dict[str, Any]]:
+def build_corpus(paths_or_dir: List[str], chunk_size: int | None = None, chunk_overlap: int | None = None,
+                 workers: int = 1, timeout: float = 300.0, chunker: str = "token") -> List[Dict[str, Any]]:
     """
     문서를 청크 단위로 나눠 코퍼스 생성
     반환 예: [{"id":"<path>::chunk_0000","text":"...", "meta":{"path":..., "chunk":0}}, ...]
+    - chunker: token(기본, 구조 경계 + 토큰 예산) | char(기존 글자 슬라이딩 윈도우)
+    - chunk_size/chunk_overlap 단위는 chunker 를 따름(미지정 시 CHUNK_DEFAULTS)
     """
     # ----------------------------------------------------------------------------
     # TODO[DAY2-G-06] 구현 지침
@@ -150,14 +247,40 @@ def build_corpus(paths_or_dir: List[str]) -> List[Dict[str, Any]]:
     #           corpus.append({"id":cid,"text":ch,"meta":{"path":d["path"],"chunk":i}})
     #  - return corpus
     # ----------------------------------------------------------------------------
-    docs = load_documents(paths_or_dir)
-    corpus: List[Dict[str, Any]] = []
-    for d in docs:
-        chunks = chunk_text(d["text"])
-        for i, ch in enumerate(chunks):
-            cid = f"{d['path']}::chunk_{i:04d}"
-            corpus.append({"id": cid, "text": ch, "meta": {"path": d["path"], "chunk": i}})
-    return corpus
+    return list(iter_corpus(paths_or_dir, chunk_size, chunk_overlap, workers=workers, timeout=timeout,
+                            chunker=chunker))
+
+
+def iter_corpus(paths_or_dir: List[str], chunk_size: int | None = None, chunk_overlap: int | None = None,
+                workers: int = 1, timeout: float = 300.0, chunker: str = "token") -> Iterator[Dict[str, Any]]:
+    """build_corpus 의 제너레이터 버전: 파일 1개씩 읽어 청크를 흘려보냄(전체 코퍼스를 메모리에 올리지 않음)"""
+    docs = iter_documents(paths_or_dir, workers=workers, timeout=timeout)
+    try:
+        for doc in docs:
+            yield from chunk_document(doc, chunk_size, chunk_overlap, chunker=chunker)
+    finally:
+        docs.close()  # 소비 도중 닫히면 파싱 풀 종료
+
+
+def resolve_chunking(chunker: str, chunk_size: int | None, chunk_overlap: int | None):
+    """(chunker, chunk_size, chunk_overlap) 검증 + 미지정 값은 chunker 기본값으로 채움"""
+    if chunker not in CHUNKERS:
+        raise ValueError(f"지원하지 않는 chunker 입니다: {chunker} (가능: {', '.join(CHUNKERS)})")
+    size, overlap = CHUNK_DEFAULTS[chunker]
+    return (chunker, size if chunk_size is None else int(chunk_size),
+            overlap if chunk_overlap is None else int(chunk_overlap))
+
+
+def chunk_document(doc: Dict[str, Any], chunk_size: int | None = None, chunk_overlap: int | None = None,
+                   chunker: str = "token") -> List[Dict[str, Any]]:
+    """문서 1개 → 코퍼스 아이템 목록 (id 규칙: <path>::chunk_0000)"""
+    chunker, chunk_size, chunk_overlap = resolve_chunking(chunker, chunk_size, chunk_overlap)
+    if chunker == "token":
+        chunks = chunk_text_tokens(doc["text"], chunk_size, chunk_overlap)
+    else:
+        chunks = chunk_text(doc["text"], chunk_size, chunk_overlap)
+    return [{"id": f"{doc['path']}::chunk_{i:04d}", "text": ch, "meta": {"path": doc["path"], "chunk": i}}
+            for i, ch in enumerate(chunks)]
 
 
 def save_docs_jsonl(items: List[Dict[str, Any]], out_path: str):
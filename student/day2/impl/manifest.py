@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+인덱스 매니페스트(manifest.json)
+- build_index 가 faiss.index / docs.jsonl 옆에 기록
+- 조회 시 네트워크 호출 없이 임베딩 모델/차원 호환성을 검사하는 용도
+"""
+
+from __future__ import annotations
+import os, json, time
+from typing import Dict, Any, Optional
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# 매니페스트가 없는(구버전) 인덱스의 차원 검사용
+KNOWN_MODEL_DIMS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+
+def manifest_path(index_dir: str) -> str:
+    return os.path.join(index_dir, MANIFEST_NAME)
+
+
+def write_manifest(index_dir: str, **fields) -> Dict[str, Any]:
+    """
+    fields 예: model, dim, normalized, metric, chunk_size, chunk_overlap, count
+    - version / built_at 은 자동 기록
+    """
+    data: Dict[str, Any] = {"version": MANIFEST_VERSION,
+                            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+    data.update(fields)
+    path = manifest_path(index_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return data
+
+
+def read_manifest(index_dir: str) -> Optional[Dict[str, Any]]:
+    path = manifest_path(index_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_compat(manifest: Optional[Dict[str, Any]], model: str, index_dim: Optional[int] = None,
+                 dimensions: Optional[int] = None):
+    """
+    인덱스와 질의 임베더의 호환성 검사(불일치 시 ValueError)
+    - manifest 가 있으면 model / dimensions(축소 차원) 비교, index_dim 이 주어지면 manifest dim 과도 비교
+    - 없으면 KNOWN_MODEL_DIMS(또는 dimensions)로 알 수 있는 경우에만 차원 비교
+    """
+    if manifest is None:
+        if index_dim is None:
+            return
+        expected = dimensions or KNOWN_MODEL_DIMS.get(model)
+        if expected is not None and expected != index_dim:
+            raise ValueError(f"임베딩 차원이 인덱스와 다릅니다. (index={index_dim}, embedder={expected})")
+        return
+    if manifest.get("model") and manifest["model"] != model:
+        raise ValueError(f"임베딩 모델이 인덱스와 다릅니다. (index={manifest['model']}, embedder={model})")
+    if (manifest.get("dimensions") or None) != (dimensions or None):
+        raise ValueError(f"임베딩 출력 차원이 인덱스와 다릅니다. "
+                         f"(index={manifest.get('dimensions') or 'default'}, embedder={dimensions or 'default'})")
+    if index_dim is not None and int(manifest.get("dim", index_dim)) != index_dim:
+        raise ValueError(f"매니페스트 차원이 인덱스와 다릅니다. (manifest={manifest['dim']}, index={index_dim})")
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+벡터별 메타데이터 컬럼 (검색 필터 pushdown 용, faiss.index 옆 meta.npz)
+- 컬럼(위치 = 벡터 id): path_id(int32), type_id(int16), date(int32, YYYYMMDD · 0 = 알 수 없음)
+- path/type 은 사전(유니코드 배열)으로 저장 → 조건은 사전(작음)에서 먼저 평가하고 np.isin 으로 전체 마스크 생성
+- tombstone(None) 자리는 path_id = -1 → 어떤 필터에도 걸리지 않음
+"""
+
+from __future__ import annotations
+import os, time
+from typing import List, Dict, Any, Iterable, Optional
+import numpy as np
+
+META_NAME = "meta.npz"
+FILTER_KEYS = ("path", "path_prefix", "type", "date_from", "date_to")
+
+
+def _doc_type(path: str) -> str:
+    return os.path.splitext(path)[1].lower().lstrip(".")
+
+
+def _file_date(path: str) -> int:
+    try:
+        return int(time.strftime("%Y%m%d", time.localtime(os.path.getmtime(path))))
+    except OSError:
+        return 0
+
+
+def _as_date(v) -> int:
+    """'2024-01-31' | '20240131' | 20240131 → 20240131"""
+    return int(str(v).replace("-", "").replace(".", "")[:8])
+
+
+def _as_list(v) -> List[str]:
+    return [v] if isinstance(v, str) else list(v)
+
+
+class MetaColumns:
+    def __init__(self, paths: np.ndarray, types: np.ndarray, path_id: np.ndarray, type_id: np.ndarray,
+                 date: np.ndarray):
+        self.paths, self.types = paths, types
+        self.path_id, self.type_id, self.date = path_id, type_id, date
+
+    def __len__(self) -> int:
+        return len(self.path_id)
+
+    @classmethod
+    def build(cls, docs: Iterable[Optional[Dict[str, Any]]]) -> "MetaColumns":
+        """docs(위치 = 벡터 id) → 컬럼. date 는 meta["date"] 가 있으면 사용, 없으면 파일 수정일"""
+        path_ids: Dict[str, int] = {}
+        type_ids: Dict[str, int] = {}
+        dates: Dict[str, int] = {}
+        pid: List[int] = []
+        tid: List[int] = []
+        dt: List[int] = []
+        for d in docs:
+            if d is None:
+                pid.append(-1); tid.append(-1); dt.append(0)
+                continue
+            meta = d.get("meta", {})
+            path = meta.get("path", "")
+            pid.append(path_ids.setdefault(path, len(path_ids)))
+            tid.append(type_ids.setdefault(_doc_type(path), len(type_ids)))
+            if meta.get("date"):
+                dt.append(_as_date(meta["date"]))
+            else:
+                if path not in dates:
+                    dates[path] = _file_date(path)
+                dt.append(dates[path])
+        return cls(np.array(list(path_ids) or [""]), np.array(list(type_ids) or [""]),
+                   np.asarray(pid, dtype="int32"), np.asarray(tid, dtype="int16"), np.asarray(dt, dtype="int32"))
+
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, paths=self.paths, types=self.types, path_id=self.path_id, type_id=self.type_id, date=self.date)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MetaColumns":
+        with np.load(path, allow_pickle=False) as z:
+            return cls(z["paths"], z["types"], z["path_id"], z["type_id"], z["date"])
+
+    def mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        필터 → 허용 벡터 bool 마스크 (조건끼리 AND, 목록 값은 OR)
+        - path: 정확히 일치하는 경로(들), path_prefix: 경로 접두(디렉토리)
+        - type: 확장자(들) 예 "pdf", ["md","txt"]
+        - date_from / date_to: 포함 범위, "YYYY-MM-DD" 또는 YYYYMMDD
+        """
+        unknown = set(filters) - set(FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"지원하지 않는 필터입니다: {sorted(unknown)} (가능: {', '.join(FILTER_KEYS)})")
+        m = self.path_id >= 0
+        ok_path = np.ones(len(self.paths), dtype=bool)
+        if filters.get("path") is not None:
+            ok_path &= np.isin(self.paths, _as_list(filters["path"]))
+        if filters.get("path_prefix") is not None:
+            prefixes = tuple(_as_list(filters["path_prefix"]))
+            ok_path &= np.fromiter((p.startswith(prefixes) for p in self.paths.tolist()), dtype=bool,
+                                   count=len(self.paths))
+        if not ok_path.all():
+            m &= np.isin(self.path_id, np.nonzero(ok_path)[0])
+        if filters.get("type") is not None:
+            wanted = [t.lower().lstrip(".") for t in _as_list(filters["type"])]
+            m &= np.isin(self.type_id, np.nonzero(np.isin(self.types, wanted))[0])
+        if filters.get("date_from") is not None:
+            m &= self.date >= _as_date(filters["date_from"])
+        if filters.get("date_to") is not None:
+            m &= (self.date > 0) & (self.date <= _as_date(filters["date_to"]))
+        return m
+
+
+def build_meta_columns(docs: Iterable[Optional[Dict[str, Any]]], index_dir: str) -> MetaColumns:
+    """docs(위치 = 벡터 id, tombstone 은 None) → index_dir/meta.npz"""
+    cols = MetaColumns.build(docs)
+    cols.save(os.path.join(index_dir, META_NAME))
+    return cols
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+파싱 결과 캐시 (PDF/DOCX/XLSX 재추출 방지)
+- 키: (경로, 크기, mtime, sha256, 파서 버전)
+  · 경로 레코드 paths/<sha1(경로+버전)>.json = {size, mtime_ns, sha256} → 파일이 그대로면 해시 계산도 생략
+  · 본문 blobs/<sha256[:2]>/<sha256>.<버전>.json.gz = {"text":..., "tables":[...]} (gzip 압축 JSON)
+- 중앙 인덱스 없이 파일 단위 원자적 기록(os.replace) → 프로세스 풀 워커가 동시에 써도 안전
+- 캐시 디렉토리: 인자 또는 환경변수 DAY2_PARSE_CACHE_DIR (없으면 캐시 없이 바로 파싱)
+"""
+
+from __future__ import annotations
+import os, re, json, gzip, hashlib
+from typing import Dict, Any, Callable, Optional
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _blob_path(cache_dir: str, sha: str, parser_version: str) -> str:
+    ver = re.sub(r"[^0-9A-Za-z._-]+", "_", parser_version)
+    return os.path.join(cache_dir, "blobs", sha[:2], f"{sha}.{ver}.json.gz")
+
+
+def _load_blob(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cached_parse(path: str, parser_version: str, parse_fn: Callable[[str], Dict[str, Any]],
+                 cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    parse_fn(path) 결과({"text":..., "tables":[...]})를 캐시해 반환
+    - 파서 로직을 바꾸면 parser_version 을 올려 기존 캐시를 무효화
+    """
+    cache_dir = cache_dir or os.getenv("DAY2_PARSE_CACHE_DIR")
+    if not cache_dir:
+        return parse_fn(path)
+
+    st = os.stat(path)
+    abspath = os.path.abspath(path)
+    rec_path = os.path.join(cache_dir, "paths",
+                            hashlib.sha1(f"{abspath}\0{parser_version}".encode("utf-8")).hexdigest() + ".json")
+    try:
+        with open(rec_path, "r", encoding="utf-8") as f:
+            rec = json.load(f)
+    except (OSError, ValueError):
+        rec = None
+
+    # 1) 크기/mtime 이 같으면 해시 계산 없이 바로 조회
+    if rec and rec.get("size") == st.st_size and rec.get("mtime_ns") == st.st_mtime_ns:
+        blob = _load_blob(_blob_path(cache_dir, rec["sha256"], parser_version))
+        if blob is not None:
+            return blob
+
+    # 2) 내용 해시로 조회(touch/복사된 파일) → 없으면 파싱 후 저장
+    sha = file_sha256(path)
+    bpath = _blob_path(cache_dir, sha, parser_version)
+    blob = _load_blob(bpath)
+    if blob is None:
+        blob = parse_fn(path)
+        _atomic_write(bpath, gzip.compress(json.dumps(blob, ensure_ascii=False).encode("utf-8"), compresslevel=6))
+    _atomic_write(rec_path, json.dumps({"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                        "sha256": sha}).encode("utf-8"))
+    return blob
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+build_index 단계별 프로파일 (parse / chunk / dedup / embed / index / write_index / write_docs / bm25 / meta)
+- 단계마다: wall(초), cpu(프로세스 CPU 초, 스레드 포함), bytes_read, 최대 RSS(단계 종료 시점까지의 peak)
+  + 호출 측이 채우는 카운터(docs, chunks, api_calls, retries 등)
+- bytes_read: /proc/self/io 의 rchar 차이(없으면 psutil, 둘 다 없으면 생략). 파싱 워커 프로세스의 읽기는
+  잡히지 않으므로 parse 단계는 입력 파일 크기 합을 직접 기록
+- 요약 표 출력 + index_dir/build_profile.json (manifest 옆), cprofile_dir 지정 시 단계별 <단계>.prof
+  (cProfile 은 메인 스레드만 측정 — 임베딩 스레드 풀 내부는 embed 단계 wall/cpu 로 확인)
+"""
+
+from __future__ import annotations
+import os, sys, json, time, cProfile
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_NAME = "build_profile.json"
+
+
+def _peak_rss() -> Optional[int]:
+    """프로세스 최대 RSS(바이트). 파싱 워커(자식 프로세스) 중 최대값과 비교해 큰 쪽"""
+    if resource is not None:
+        scale = 1 if sys.platform == "darwin" else 1024  # macOS 는 바이트, Linux 는 KB
+        return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return int(getattr(info, "peak_wset", info.rss))
+    except ImportError:
+        return None
+
+
+def _bytes_read() -> Optional[int]:
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import psutil
+        return int(psutil.Process().io_counters().read_bytes)
+    except (ImportError, AttributeError):
+        return None
+
+
+class BuildProfiler:
+    def __init__(self, cprofile_dir: Optional[str] = None):
+        self.cprofile_dir = cprofile_dir
+        self.stages: List[Dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """with prof.stage("embed") as st: ...; st["api_calls"] = ...  (카운터는 st 에 직접 기록)"""
+        st: Dict[str, Any] = {}
+        prof = cProfile.Profile() if self.cprofile_dir else None
+        w0, c0, r0 = time.perf_counter(), time.process_time(), _bytes_read()
+        if prof is not None:
+            prof.enable()
+        try:
+            yield st
+        finally:
+            if prof is not None:
+                prof.disable()
+                os.makedirs(self.cprofile_dir, exist_ok=True)
+                prof.dump_stats(os.path.join(self.cprofile_dir, f"{name}.prof"))
+            r1 = _bytes_read()
+            rec = {"stage": name, "wall_s": round(time.perf_counter() - w0, 4),
+                   "cpu_s": round(time.process_time() - c0, 4),
+                   "bytes_read": (r1 - r0) if r0 is not None and r1 is not None else None,
+                   "peak_rss": _peak_rss()}
+            rec.update(st)  # 호출 측 값(예: parse 의 bytes_read)이 우선
+            self.stages.append(rec)
+
+    def summary(self) -> Dict[str, Any]:
+        return {"total_wall_s": round(time.perf_counter() - self._t0, 4),
+                "total_cpu_s": round(sum(s["cpu_s"] for s in self.stages), 4),
+                "peak_rss": max((s["peak_rss"] or 0 for s in self.stages), default=0) or None,
+                "stages": self.stages}
+
+    def table(self) -> str:
+        extra = [k for s in self.stages for k in s if k not in _BASE_COLS]
+        cols = list(_BASE_COLS) + list(dict.fromkeys(extra))
+        total = sum(s["wall_s"] for s in self.stages) or 1.0
+        rows = [cols + ["wall%"]]
+        for s in self.stages:
+            rows.append([_fmt(k, s.get(k)) for k in cols] + [f"{s['wall_s'] / total * 100:.1f}"])
+        widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+        return "\n".join("  ".join(c.rjust(w) if i else c.ljust(w) for i, (c, w) in enumerate(zip(r, widths)))
+                         for r in rows)
+
+    def write(self, index_dir: str) -> str:
+        path = os.path.join(index_dir, PROFILE_NAME)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(self.summary(), built_at=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                           cprofile_dir=self.cprofile_dir), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        return path
+
+
+_BASE_COLS = ("stage", "wall_s", "cpu_s", "bytes_read", "peak_rss")
+
+
+def _fmt(key: str, v) -> str:
+    if v is None:
+        return "-"
+    if key in ("bytes_read", "peak_rss") and isinstance(v, (int, float)):
+        return f"{v / (1 << 20):.1f}MB"
+    return str(v)
@@ -1,12 +1,19 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
-import os, json
+import os, json, time
 from typing import Dict, Any, List
 import numpy as np
 
 from student.common.schemas import Day2Plan
 from .embeddings import Embeddings
 from .store import FaissStore
+from .manifest import read_manifest, check_compat
+from .registry import REGISTRY
+from .sharded import ShardedStore
+from .bm25 import rrf_fuse, normalize_query, tokenize
+from .result_cache import ResultCache, RESULT_CACHE, plan_key
+from .semantic_cache import SemanticCache, SEMANTIC_CACHE
+from .rerank import rerank
 
 def _idx_paths(index_dir: str):
     return (
@@ -14,26 +21,46 @@ def _idx_paths(index_dir: str):
         os.path.join(index_dir, "docs.jsonl"),
     )
 
-def _load_store(plan: Day2Plan, emb: Embeddings) -> FaissStore:
+def _load_store(plan: Day2Plan, emb: Embeddings) -> FaissStore | ShardedStore:
     index_path, docs_path = _idx_paths(plan.index_dir)
-    if not (os.path.exists(index_path) and os.path.exists(docs_path)):
+    manifest = read_manifest(plan.index_dir)
+    sharded = bool(manifest and manifest.get("shards"))
+    if not sharded and not (os.path.exists(index_path) and os.path.exists(docs_path)):
         raise FileNotFoundError(f"FAISS 인덱스가 없습니다. 먼저 ingest를 실행하세요: {plan.index_dir}")
-    store = FaissStore.load(index_path, docs_path)
-    # 차원 체크
-    test_dim = emb.encode(["__dim_check__"]).shape[1]
-    if store.dim != test_dim:
-        raise ValueError(f"임베딩 차원이 인덱스와 다릅니다. (index={store.dim}, embedder={test_dim})")
+    # 호환성 체크: 매니페스트 기준(네트워크 호출 없음). 인덱스 로드 전에 모델 불일치를 먼저 걸러냄
+    check_compat(manifest, emb.model, dimensions=emb.dimensions)
+    store = REGISTRY.get_store(plan.index_dir)  # 프로세스 상주 캐시(파일 변경 시 재로드)
+    check_compat(manifest, emb.model, store.dim, dimensions=emb.dimensions)
     return store
 
+def _embedder(plan: Day2Plan) -> Embeddings:
+    """질의 임베더: 출력 차원은 plan.embedding_dimensions, 없으면 인덱스 manifest 의 dimensions 를 따름"""
+    dims = plan.embedding_dimensions or (read_manifest(plan.index_dir) or {}).get("dimensions")
+    return REGISTRY.get_embedder(plan.embedding_model, dimensions=dims)
+
 def _gate(contexts: List[Dict[str, Any]], plan: Day2Plan) -> Dict[str, Any]:
     if not contexts:
         return {"status":"insufficient","top_score":0.0,"mean_topk":0.0}
+    if "coverage" in contexts[0]:
+        return _gate_sparse(contexts, plan)
     top_score = float(contexts[0]["score"])
     mean_topk = float(np.mean([c["score"] for c in contexts[:plan.top_k]]))
     if top_score >= plan.min_score and mean_topk >= plan.min_mean_topk:
         return {"status":"enough","top_score":top_score,"mean_topk":mean_topk}
     return {"status":"insufficient","top_score":top_score,"mean_topk":mean_topk}
 
+def _gate_sparse(contexts: List[Dict[str, Any]], plan: Day2Plan) -> Dict[str, Any]:
+    """
+    임베딩 생략(sparse_skip_embed) 결과 게이트: 코사인 임계값과 비교할 수 없으므로 별도 기준
+    - enough: 1위 청크가 질의 토큰을 모두 포함(coverage 1.0) + 질의 고유 토큰 수 ≥ plan.sparse_gate_min_tokens
+      (한두 단어 질의는 어느 문서에나 그대로 나올 수 있어 근거로 약함)
+    """
+    top = float(contexts[0]["coverage"])
+    mean = float(np.mean([c["coverage"] for c in contexts[:plan.top_k]]))
+    ok = top >= 1.0 and contexts[0].get("query_tokens", 0) >= plan.sparse_gate_min_tokens
+    return {"status": "enough" if ok else "insufficient", "basis": "sparse_coverage",
+            "top_score": 0.0, "mean_topk": 0.0, "top_coverage": top, "mean_coverage": mean}
+
 def _draft_answer(query: str, contexts: List[Dict[str, Any]], plan: Day2Plan) -> str:
     buf, budget = [], plan.max_context
     for c in contexts:
@@ -46,28 +73,193 @@ def _draft_answer(query: str, contexts: List[Dict[str, Any]], plan: Day2Plan) ->
             break
     return f"질의: {query}\n\n핵심 근거 요약:\n" + "\n".join(buf) if buf else ""
 
+def _fuse(dense: List[Dict[str, Any]], sparse: List[Dict[str, Any]], plan: Day2Plan,
+          limit: int) -> List[Dict[str, Any]]:
+    """벡터/BM25 결과를 RRF 로 결합. score 는 벡터 코사인 유지(BM25 에만 걸린 문서는 0.0), bm25/rrf 는 별도 필드"""
+    by_id: Dict[str, Dict[str, Any]] = {h["doc_id"]: dict(h, retrieval="dense") for h in dense}
+    for h in sparse:
+        cur = by_id.get(h["doc_id"])
+        if cur is None:
+            by_id[h["doc_id"]] = dict(h, score=0.0, retrieval="sparse")
+        else:
+            cur["bm25"], cur["retrieval"] = h["bm25"], "hybrid"
+    fused = rrf_fuse([[h["doc_id"] for h in dense], [h["doc_id"] for h in sparse]], k=plan.rrf_k)
+    return [dict(by_id[d], rrf=round(sc, 6)) for d, sc in fused[:limit]]
+
+def _search_sizes(plan: Day2Plan, store: FaissStore):
+    """(BM25 인덱스 또는 None, 최종 후보 수, 1단계 검색 수)"""
+    sparse = store.sparse if plan.hybrid else None
+    cand = max(plan.top_k, plan.rerank_fetch) if plan.rerank else plan.top_k
+    fetch = max(cand * 4, 20) if sparse is not None else cand
+    return sparse, cand, fetch
+
+def _sparse_pass(queries: List[str], plan: Day2Plan, store: FaissStore):
+    """BM25 단계 → (질의별 BM25 hits, 질의별 결과). 결과는 임베딩을 생략한 질의만 채워지고 나머지는 None"""
+    sparse, _, fetch = _search_sizes(plan, store)
+    mask = store.filter_mask(plan.filters) if sparse is not None else None  # BM25 에도 같은 필터 적용
+    sparse_hits: List[List[Dict[str, Any]]] = [[] for _ in queries]
+    results: List[Any] = [None] * len(queries)
+    if sparse is not None:
+        for i, q in enumerate(queries):
+            hits = [store.hit(idx, sc) for idx, sc in sparse.search(q, top_k=fetch, mask=mask)]
+            sparse_hits[i] = [dict(h, bm25=h["score"]) for h in hits if h is not None]
+            nq = normalize_query(q)
+            top = sparse_hits[i][:plan.top_k]
+            if plan.sparse_skip_embed and top and len(nq) >= 2 and nq in normalize_query(top[0]["chunk"]):
+                n_tok = len(set(tokenize(q)))
+                ctx = [dict(h, score=0.0, coverage=round(sparse.coverage(q, h["chunk"]), 4),
+                            query_tokens=n_tok, retrieval="sparse") for h in top]
+                results[i] = (ctx, ctx)
+    return sparse_hits, results
+
+def _dense_pass(queries: List[str], rows: List[int], plan: Day2Plan, emb: Embeddings, store: FaissStore,
+                sparse_hits: List[List[Dict[str, Any]]], results: List[Any], qm: np.ndarray | None = None):
+    """rows 번째 질의들을 벡터(+BM25 RRF) 검색해 results 를 채움. qm: rows 순서의 미리 계산한 질의 벡터"""
+    if not rows:
+        return
+    sparse, cand, fetch = _search_sizes(plan, store)
+    if qm is None:
+        qm = emb.encode([queries[i] for i in rows])
+    for i, dense in zip(rows, store.search_batch(qm, top_k=fetch, filters=plan.filters)):
+        if sparse is None:
+            results[i] = (dense, dense[:plan.top_k])
+        else:
+            results[i] = (_fuse(dense, sparse_hits[i], plan, cand), dense[:plan.top_k])
+
+def _retrieve(queries: List[str], plan: Day2Plan, emb: Embeddings, store: FaissStore):
+    """
+    질의별 (contexts, gate 기준 결과) 반환
+    - plan.filters: meta.npz 컬럼 기준 필터를 faiss IDSelector / BM25 점수 마스크로 검색 내부에서 적용
+    - store.sparse(bm25.npz) 가 있고 plan.hybrid 이면 BM25 + 벡터 RRF 결합, gate 는 벡터 점수 기준 유지
+    - plan.sparse_skip_embed(기본 끔): 질의 문자열이 BM25 1위 문서에 그대로 등장하면 임베딩 호출 없이 BM25 결과 사용
+      (벡터 점수가 없으므로 score = 0.0, 질의 토큰 포함 비율은 coverage 필드 → _gate_sparse 로 판정)
+    - plan.rerank 가 있으면 contexts 는 재순위화 후보 max(top_k, rerank_fetch) 개 (잘라내기는 호출자)
+    """
+    sparse_hits, results = _sparse_pass(queries, plan, store)
+    _dense_pass(queries, [i for i, r in enumerate(results) if r is None], plan, emb, store, sparse_hits, results)
+    return results
+
 class Day2Agent:
-    def __init__(self, plan_defaults: Day2Plan = Day2Plan()):
+    def __init__(self, plan_defaults: Day2Plan = Day2Plan(), cache: ResultCache | None = RESULT_CACHE,
+                 semantic_cache: SemanticCache | None = SEMANTIC_CACHE):
+        """
+        cache: payload 결과 캐시(기본은 프로세스 공용 RESULT_CACHE, None 이면 사용 안 함)
+        semantic_cache: 유사 질의 캐시(plan.semantic_cache_threshold 를 지정한 경우에만 조회/기록)
+        """
         self.plan_defaults = plan_defaults
+        self.cache = cache
+        self.semantic_cache = semantic_cache
 
     def handle(self, query: str, plan: Day2Plan = None) -> Dict[str, Any]:
+        return self.handle_many([query], plan)[0]
+
+    def handle_many(self, queries: List[str], plan: Day2Plan = None) -> List[Dict[str, Any]]:
+        """
+        여러 질의를 한 번에 처리: 배치 임베딩 1회(+캐시) + faiss 배치 검색 1회
+        - 반환 순서 = queries 순서, 각 payload 는 handle() 과 동일한 형태
+        - 결과 캐시에 있는 질의(정규화 질의 + plan + 인덱스 버전 일치)는 임베딩/검색/게이팅 생략
+        - plan.semantic_cache_threshold 가 있으면 남은 질의를 임베딩해 과거 질의와 비교,
+          코사인 ≥ 임계값이면 그 contexts / gating 재사용(코퍼스 검색 생략, cache="semantic")
+        """
         plan = plan or self.plan_defaults
-        emb = Embeddings(model=plan.embedding_model)
+        if not queries:
+            return []
+        queries = list(queries)
+        payloads: List[Any] = [None] * len(queries)
+        keys: List[Any] = [None] * len(queries)
+        version = REGISTRY.index_version(plan.index_dir)
+        if self.cache is not None:
+            for i, q in enumerate(queries):
+                keys[i] = ResultCache.key(q, plan, version)
+                cached = self.cache.get(keys[i])
+                if cached is not None:
+                    payloads[i] = _from_cache(cached, q, plan)
+        todo = [i for i, p in enumerate(payloads) if p is None]
+        if not todo:
+            return payloads
+        emb = _embedder(plan)
 
         store = _load_store(plan, emb)
-        qv = emb.encode([query])[0]
-        contexts = store.search(qv, top_k=plan.top_k)
-
-        gate = _gate(contexts, plan)
-        payload: Dict[str, Any] = {
-            "type": "rag_answer",
-            "query": query,
-            "plan": plan.__dict__,
-            "contexts": contexts,
-            "gating": gate,
-            "answer": "",
-            "notice": "web_merge_in_day4_only",
-        }
-        if plan.force_rag_only or (gate["status"] == "enough" and plan.return_draft_when_enough):
-            payload["answer"] = _draft_answer(query, contexts, plan)
-        return payload
+        t0 = time.perf_counter()
+        qs = [queries[i] for i in todo]
+        sparse_hits, results = _sparse_pass(qs, plan, store)
+        rows = [j for j, r in enumerate(results) if r is None]  # 임베딩이 필요한 질의(BM25 로 끝난 질의 제외)
+        qm = None
+        semantic = self.semantic_cache if plan.semantic_cache_threshold is not None else None
+        if semantic is not None and rows:
+            namespace = (plan_key(plan, exclude=("semantic_cache_threshold",)), version)
+            qm = emb.encode([qs[j] for j in rows])  # 한 번만 임베딩: 의미 캐시 조회 + 미적중분 검색에 재사용
+            found = semantic.lookup(namespace, qm, plan.semantic_cache_threshold)
+            for j, f in zip(rows, found):
+                if f is not None:
+                    payloads[todo[j]] = _from_semantic(f, qs[j], plan)
+            miss = [f is None for f in found]
+            qm = qm[miss]
+            rows = [j for j, m in zip(rows, miss) if m]
+        _dense_pass(qs, rows, plan, emb, store, sparse_hits, results, qm)
+        retrieve_ms = round((time.perf_counter() - t0) * 1000.0, 3)
+
+        done = [j for j, r in enumerate(results) if r is not None]
+        for j in done:
+            i = todo[j]
+            contexts, gate_hits = results[j]
+            timings: Dict[str, Any] = {"retrieve_ms": retrieve_ms, "batch": len(done)}
+            if plan.rerank:
+                contexts, info = rerank(queries[i], contexts, plan.rerank, plan.top_k, plan.rerank_budget_ms)
+                timings.update(info)
+            payloads[i] = _payload(queries[i], contexts, plan, gate_hits, timings)
+            if self.cache is not None:
+                self.cache.put(keys[i], payloads[i])
+        if semantic is not None and rows:
+            semantic.add(namespace, qm, [qs[j] for j in rows], [payloads[todo[j]] for j in rows])
+        for j in done:
+            payloads[todo[j]]["cache"] = "miss"
+        return payloads
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """결과 캐시 / 의미 캐시 hit/miss 카운터 (미사용 캐시는 빈 dict)"""
+        stats = self.cache.stats() if self.cache is not None else {}
+        if self.semantic_cache is not None:
+            stats = dict(stats, semantic=self.semantic_cache.stats())
+        return stats
+
+
+def _from_cache(payload: Dict[str, Any], query: str, plan: Day2Plan) -> Dict[str, Any]:
+    """캐시 payload 를 이번 질의 표기로 맞춤(정규화 전 문자열이 다를 수 있음)"""
+    if payload["query"] != query:
+        payload["query"] = query
+        if payload["answer"]:
+            payload["answer"] = _draft_answer(query, payload["contexts"], plan)
+    payload["cache"] = "hit"
+    return payload
+
+
+def _from_semantic(found, query: str, plan: Day2Plan) -> Dict[str, Any]:
+    """유사 질의 캐시 hit: contexts / gating 재사용, 초안은 이번 질의로 다시 구성(검색·LLM 호출 없음)"""
+    score, cached_query, payload = found
+    payload["query"] = query
+    payload["plan"] = dict(plan.__dict__)
+    if payload["answer"]:
+        payload["answer"] = _draft_answer(query, payload["contexts"], plan)
+    payload["cache"] = "semantic"
+    payload["semantic_match"] = {"query": cached_query, "score": round(float(score), 4)}
+    return payload
+
+def _payload(query: str, contexts: List[Dict[str, Any]], plan: Day2Plan,
+             gate_hits: List[Dict[str, Any]] | None = None,
+             timings: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    gate = _gate(contexts if gate_hits is None else gate_hits, plan)
+    payload: Dict[str, Any] = {
+        "type": "rag_answer",
+        "query": query,
+        "plan": plan.__dict__,
+        "contexts": contexts,
+        "gating": gate,
+        "answer": "",
+        "notice": "web_merge_in_day4_only",
+    }
+    if timings is not None:
+        payload["timings"] = timings  # retrieve_ms 는 배치(batch 개 질의) 전체 시간
+    if plan.force_rag_only or (gate["status"] == "enough" and plan.return_draft_when_enough):
+        payload["answer"] = _draft_answer(query, contexts, plan)
+    return payload
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+프로세스 상주 스토어/임베더 레지스트리
+- index_dir 별 FaissStore 를 한 번만 로드해 재사용(스레드 안전)
+- faiss.index / docs.jsonl / docs.idx / manifest.json / bm25.npz / meta.npz 의 (mtime, size) 가 바뀌면 다음 조회 시 다시 로드
+- 샤드 인덱스(manifest 의 shards)는 ShardedStore 로 로드 (샤드 재빌드 시 상위 manifest 가 다시 기록되어 재로드됨)
+- 임베딩 클라이언트도 (모델, 출력 차원)별로 1개만 만들어 재사용
+"""
+
+from __future__ import annotations
+import os, threading
+from typing import Dict, Tuple, Optional
+
+from .embeddings import Embeddings
+from .manifest import MANIFEST_NAME, read_manifest
+from .bm25 import BM25_NAME
+from .meta_columns import META_NAME
+from .sharded import ShardedStore
+from .store import FaissStore, VECTORS_NAME
+
+_WATCHED = ("faiss.index", "docs.jsonl", "docs.idx", MANIFEST_NAME, BM25_NAME, META_NAME, VECTORS_NAME)
+
+
+def _signature(index_dir: str) -> Tuple:
+    sig = []
+    for name in _WATCHED:
+        try:
+            st = os.stat(os.path.join(index_dir, name))
+            sig.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
+
+class StoreRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dir_locks: Dict[str, threading.Lock] = {}
+        self._stores: Dict[str, Tuple[Tuple, FaissStore]] = {}
+        self._embedders: Dict[str, Embeddings] = {}
+
+    def _dir_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._dir_locks.setdefault(key, threading.Lock())
+
+    def get_store(self, index_dir: str) -> FaissStore | ShardedStore:
+        """로드된 스토어 반환. 파일이 바뀌었으면 재로드 (같은 디렉토리 동시 로드는 1회로 합침)"""
+        key = os.path.abspath(index_dir)
+        sig = _signature(key)
+        hit = self._stores.get(key)
+        if hit is not None and hit[0] == sig:
+            return hit[1]
+        with self._dir_lock(key):
+            hit = self._stores.get(key)
+            if hit is not None and hit[0] == sig:
+                return hit[1]
+            manifest = read_manifest(key) or {}
+            if manifest.get("shards"):  # 샤드 인덱스: 샤드별 FaissStore 를 묶어 병렬 검색
+                store = ShardedStore.load(key, manifest)
+            else:
+                store = FaissStore.load_dir(key)
+            self._stores[key] = (sig, store)
+            return store
+
+    def index_version(self, index_dir: str) -> Tuple:
+        """인덱스 파일들의 (mtime, size) 서명. 재빌드/증분 갱신 시 값이 바뀜(결과 캐시 키용)"""
+        return _signature(os.path.abspath(index_dir))
+
+    def get_embedder(self, model: Optional[str], dimensions: Optional[int] = None) -> Embeddings:
+        key = f"{model or ''}@{dimensions or ''}"
+        emb = self._embedders.get(key)
+        if emb is None:
+            with self._lock:
+                emb = self._embedders.get(key)
+                if emb is None:
+                    emb = self._embedders[key] = Embeddings(model=model, dimensions=dimensions)
+        return emb
+
+    def invalidate(self, index_dir: Optional[str] = None):
+        with self._lock:
+            if index_dir is None:
+                self._stores.clear()
+            else:
+                self._stores.pop(os.path.abspath(index_dir), None)
+
+
+REGISTRY = StoreRegistry()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+2단계 재순위화(rerank) — 1단계(벡터/하이브리드) 후보를 넉넉히(plan.rerank_fetch) 가져와 다시 정렬 후 top_k
+- "lexical": 후보 집합 안에서 계산한 BM25(질의 토큰, 후보 내 idf) + 질의 원문 포함 가산점, 1단계 순위와 가중 결합
+- "cross:<모델>": sentence-transformers CrossEncoder (예 cross:cross-encoder/ms-marco-MiniLM-L-6-v2), CPU 실행
+- 질의별 지연 예산(plan.rerank_budget_ms): 배치 사이마다 확인, 예산을 넘기면 1단계 순서로 폴백
+  (실행 중인 배치 하나는 끊을 수 없으므로 최악 지연 ≈ 예산 + 배치 1회)
+"""
+
+from __future__ import annotations
+import math, threading, time
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+from .bm25 import tokenize, normalize_query
+
+_LEX_WEIGHT = 0.7     # lexical 점수 비중 (나머지는 1단계 순위 prior)
+_PHRASE_BONUS = 0.5   # 질의 원문(정규화)이 청크에 그대로 있으면 가산
+
+
+class Reranker:
+    """score(query, texts, deadline) → 후보별 점수(클수록 관련), deadline(perf_counter) 초과 시 None"""
+    name = ""
+    batch = 8
+
+    def score(self, query: str, texts: List[str], deadline: float) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+
+class LexicalReranker(Reranker):
+    name = "lexical"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1, self.b = k1, b
+
+    def score(self, query: str, texts: List[str], deadline: float) -> Optional[np.ndarray]:
+        q = set(tokenize(query))
+        nq = normalize_query(query)
+        if not q or not texts:
+            return np.zeros(len(texts), dtype="float32")
+        tfs: List[Dict[str, int]] = []
+        lens: List[int] = []
+        phrase = np.zeros(len(texts), dtype="float32")
+        for i, t in enumerate(texts):
+            if i % self.batch == 0 and time.perf_counter() > deadline:
+                return None
+            toks = tokenize(t)
+            lens.append(len(toks))
+            tf: Dict[str, int] = {}
+            for tok in toks:
+                if tok in q:
+                    tf[tok] = tf.get(tok, 0) + 1
+            tfs.append(tf)
+            if len(nq) >= 2 and nq in normalize_query(t):
+                phrase[i] = _PHRASE_BONUS
+        n = len(texts)
+        avgdl = max(1.0, sum(lens) / n)
+        df = {tok: sum(1 for tf in tfs if tok in tf) for tok in q}
+        idf = {tok: math.log1p((n - d + 0.5) / (d + 0.5)) for tok, d in df.items()}
+        out = np.zeros(n, dtype="float32")
+        for i, (tf, dl) in enumerate(zip(tfs, lens)):
+            norm = self.k1 * (1 - self.b + self.b * dl / avgdl)
+            out[i] = sum(idf[tok] * c * (self.k1 + 1) / (c + norm) for tok, c in tf.items())
+        if out.max() > 0:
+            out /= out.max()
+        return out + phrase
+
+
+class CrossEncoderReranker(Reranker):
+    batch = 16
+
+    def __init__(self, model: str):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise RuntimeError("cross-encoder 재순위화에는 sentence-transformers 가 필요합니다. "
+                               "`pip install sentence-transformers`")
+        self.name = f"cross:{model}"
+        self.model = CrossEncoder(model, device="cpu")
+
+    def score(self, query: str, texts: List[str], deadline: float) -> Optional[np.ndarray]:
+        out: List[float] = []
+        for s in range(0, len(texts), self.batch):
+            if time.perf_counter() > deadline:
+                return None
+            pairs = [(query, t) for t in texts[s:s + self.batch]]
+            out.extend(np.asarray(self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False),
+                                  dtype="float32").ravel().tolist())
+        return np.asarray(out, dtype="float32")
+
+
+_RERANKERS: Dict[str, Reranker] = {}
+_LOCK = threading.Lock()
+
+
+def get_reranker(spec: str) -> Reranker:
+    """"lexical" | "cross:<모델>" → 프로세스 상주 인스턴스(모델 로드는 1회)"""
+    with _LOCK:
+        r = _RERANKERS.get(spec)
+        if r is None:
+            if spec == "lexical":
+                r = LexicalReranker()
+            elif spec.startswith("cross:"):
+                r = CrossEncoderReranker(spec.split(":", 1)[1])
+            else:
+                raise ValueError(f"지원하지 않는 rerank 방식입니다: {spec} (가능: lexical, cross:<모델>)")
+            _RERANKERS[spec] = r
+        return r
+
+
+def rerank(query: str, contexts: List[Dict[str, Any]], spec: str, top_k: int,
+           budget_ms: float) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    1단계 후보(순위순) → (top_k 결과, 정보 {"reranker","status","candidates","rerank_ms"})
+    - status: "applied" | "fallback"(예산 초과 → 1단계 순서) | "skipped"(후보 ≤ 1)
+    - 결과의 score(게이트용 1단계 점수)는 그대로 두고 rerank 점수는 별도 필드
+    """
+    info: Dict[str, Any] = {"reranker": spec, "candidates": len(contexts)}
+    if len(contexts) <= 1:
+        return contexts[:top_k], dict(info, status="skipped", rerank_ms=0.0)
+    t0 = time.perf_counter()
+    reranker = get_reranker(spec)
+    scores = reranker.score(query, [c["chunk"] for c in contexts], t0 + budget_ms / 1000.0)
+    elapsed = (time.perf_counter() - t0) * 1000.0
+    if scores is None or elapsed > budget_ms:
+        return contexts[:top_k], dict(info, status="fallback", rerank_ms=round(elapsed, 3))
+    if isinstance(reranker, LexicalReranker):
+        prior = 1.0 - np.arange(len(contexts), dtype="float32") / len(contexts)
+        scores = _LEX_WEIGHT * scores + (1 - _LEX_WEIGHT) * prior
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    out = [dict(contexts[i], rerank=round(float(scores[i]), 6), first_rank=int(i) + 1) for i in order]
+    return out, dict(info, status="applied", rerank_ms=round(elapsed, 3))
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Day2Agent.handle 결과(payload) 캐시 (프로세스 상주, LRU + TTL)
+- 키: 정규화한 질의 + plan 필드 전체 + 인덱스 버전(REGISTRY.index_version: manifest/faiss.index 등의 mtime·size)
+  → 인덱스를 다시 빌드하면 버전이 바뀌어 이전 결과는 자동으로 무효(LRU 에서 밀려나 정리)
+- 저장/반환 시 deepcopy → 호출자가 payload 를 수정해도 캐시가 오염되지 않음
+- stats(): hits / misses / evictions / expired / size / hit_rate
+"""
+
+from __future__ import annotations
+import copy, json, threading, time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from .bm25 import normalize_query
+
+
+def plan_key(plan, exclude: Tuple[str, ...] = ()) -> str:
+    """plan(dataclass) 필드 → 정렬된 JSON 문자열 (filters dict 포함, exclude 필드 제외)"""
+    fields = {k: v for k, v in plan.__dict__.items() if k not in exclude}
+    return json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = 512, ttl: Optional[float] = 600.0):
+        """max_entries=0 이면 비활성, ttl=None 이면 만료 없음(인덱스 버전 변경으로만 무효화)"""
+        self.max_entries = int(max_entries)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+    @staticmethod
+    def key(query: str, plan, version: Tuple) -> Tuple:
+        return (normalize_query(query), plan_key(plan), version)
+
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and self.ttl is not None and time.monotonic() - item[0] > self.ttl:
+                del self._data[key]
+                self.expired += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            payload = item[1]
+        return copy.deepcopy(payload)
+
+    def put(self, key: Tuple, payload: Dict[str, Any]):
+        if self.max_entries <= 0:
+            return
+        payload = copy.deepcopy(payload)
+        with self._lock:
+            self._data[key] = (time.monotonic(), payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "expired": self.expired, "size": len(self._data), "max_entries": self.max_entries,
+                    "ttl": self.ttl, "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+
+RESULT_CACHE = ResultCache()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+의미 기반 질의 캐시 (과거 질의 임베딩 최근접 이웃 조회, 프로세스 상주)
+- 이름공간(plan 필드 + 인덱스 버전)별로 작은 faiss IndexIDMap2(IndexFlatIP) 에 질의 벡터를 저장
+- 새 질의 벡터와 가장 가까운 과거 질의의 코사인 ≥ threshold 이면 그 질의의 contexts / gating 을 재사용
+  (코퍼스 검색 생략. 임베딩은 L2 정규화되어 있으므로 내적 = 코사인)
+- 용량 초과 시 가장 오래 쓰이지 않은 항목부터 remove_ids 로 제거(LRU), ttl 지나면 조회 시 제거
+- stats(): hits / misses / hit_rate, threshold_report(): 관측한 최근접 유사도 분포로 임계값별 예상 hit rate
+"""
+
+from __future__ import annotations
+import copy, threading, time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+import faiss
+
+# 임계값 효과 보고용으로 보관하는 최근 유사도 개수
+_SIM_HISTORY = 4096
+
+
+class _Space:
+    """이름공간 하나: 벡터 인덱스 + id → (저장 시각, 원 질의, payload)"""
+
+    def __init__(self, dim: int):
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self.entries: "OrderedDict[int, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+
+    def remove(self, ids: List[int]):
+        if ids:
+            self.index.remove_ids(np.asarray(ids, dtype="int64"))
+            for i in ids:
+                self.entries.pop(i, None)
+
+
+class SemanticCache:
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 600.0):
+        """max_entries 는 이름공간별 상한. 임계값은 조회 시(plan.semantic_cache_threshold) 지정"""
+        self.max_entries = int(max_entries)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._spaces: Dict[Tuple, _Space] = {}
+        self._next_id = 0
+        self._sims: List[float] = []
+        self.hits = self.misses = 0
+
+    def lookup(self, namespace: Tuple, vecs: np.ndarray, threshold: float
+               ) -> List[Optional[Tuple[float, str, Dict[str, Any]]]]:
+        """질의 벡터들(N, D) → 질의별 (유사도, 캐시된 원 질의, payload 사본) 또는 None"""
+        out: List[Optional[Tuple[float, str, Dict[str, Any]]]] = [None] * len(vecs)
+        with self._lock:
+            space = self._spaces.get(namespace)
+            if space is not None and self.ttl is not None:
+                now = time.monotonic()
+                space.remove([i for i, (ts, _, _) in space.entries.items() if now - ts > self.ttl])
+            if space is None or not space.index.ntotal:
+                self.misses += len(vecs)
+                return out
+            sims, ids = space.index.search(np.ascontiguousarray(vecs, dtype="float32"), 1)
+            for r, (s, i) in enumerate(zip(sims[:, 0].tolist(), ids[:, 0].tolist())):
+                self._sims.append(s)
+                if i < 0 or s < threshold:
+                    self.misses += 1
+                    continue
+                space.entries.move_to_end(i)
+                _, cached_query, payload = space.entries[i]
+                out[r] = (s, cached_query, copy.deepcopy(payload))
+                self.hits += 1
+            del self._sims[:-_SIM_HISTORY]
+        return out
+
+    def add(self, namespace: Tuple, vecs: np.ndarray, queries: Sequence[str], payloads: Sequence[Dict[str, Any]]):
+        if self.max_entries <= 0 or not len(vecs):
+            return
+        vecs = np.ascontiguousarray(vecs, dtype="float32")
+        with self._lock:
+            space = self._spaces.get(namespace)
+            if space is None:
+                # 인덱스 버전이 바뀐 옛 이름공간은 더 이상 조회되지 않으므로 정리
+                stale = [k for k in self._spaces if k[0] == namespace[0]]
+                for k in stale:
+                    del self._spaces[k]
+                space = self._spaces[namespace] = _Space(vecs.shape[1])
+            ids = np.arange(self._next_id, self._next_id + len(vecs), dtype="int64")
+            self._next_id += len(vecs)
+            space.index.add_with_ids(vecs, ids)
+            now = time.monotonic()
+            for i, q, p in zip(ids.tolist(), queries, payloads):
+                space.entries[i] = (now, q, copy.deepcopy(p))
+            over = len(space.entries) - self.max_entries
+            if over > 0:
+                space.remove(list(space.entries)[:over])
+
+    def clear(self):
+        with self._lock:
+            self._spaces.clear()
+            self._sims.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                    "size": sum(len(s.entries) for s in self._spaces.values()),
+                    "namespaces": len(self._spaces), "max_entries": self.max_entries, "ttl": self.ttl}
+
+    def threshold_report(self, thresholds: Sequence[float] = (0.8, 0.85, 0.9, 0.95, 0.98)) -> List[Dict[str, Any]]:
+        """
+        최근 조회들의 최근접 유사도 분포 → 임계값별 예상 hit rate
+        (캐시가 비어 있던 조회는 분포에 없음. 임계값을 낮출수록 hit 은 늘지만 다른 의도의 질의가 섞일 위험)
+        """
+        with self._lock:
+            sims = np.asarray(self._sims, dtype="float32")
+        return [{"threshold": t, "lookups": int(len(sims)),
+                 "hit_rate": round(float((sims >= t).mean()), 4) if len(sims) else 0.0}
+                for t in thresholds]
+
+
+SEMANTIC_CACHE = SemanticCache()
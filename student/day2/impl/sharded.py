@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+샤드 FaissStore
+- index_dir/shard_000, shard_001, ... 각각이 독립된 일반 인덱스 디렉토리(faiss.index, docs, bm25/meta 등)
+- 파일 → 샤드 배정은 경로 해시(shard_of) 고정 → 샤드별로 따로(다른 머신/프로세스에서) 빌드 가능
+- 상위 manifest.json 의 "shards" 목록이 샤드 구성을 기록. 조회는 스레드 풀로 샤드별 검색 후 heap 으로 top_k 병합
+  (faiss 검색은 GIL 을 놓으므로 스레드로 병렬 실행됨)
+- 스레드 풀은 모듈 전역 1개를 공유 → registry 가 인덱스 변경으로 ShardedStore 를 다시 로드해도 스레드가 늘지 않고,
+  교체 직전 스토어로 검색 중인 요청도 그대로 끝남
+"""
+
+from __future__ import annotations
+import os, heapq, hashlib, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+from .store import FaissStore
+from .manifest import read_manifest, write_manifest
+
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _shard_pool() -> ThreadPoolExecutor:
+    """샤드 검색용 공유 스레드 풀 (첫 사용 시 생성)"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=max(4, os.cpu_count() or 1), thread_name_prefix="day2-shard")
+        return _POOL
+
+
+def shard_of(path: str, n_shards: int) -> int:
+    return int(hashlib.sha1(path.encode("utf-8")).hexdigest(), 16) % n_shards
+
+
+def shard_dir(index_dir: str, shard_id: int) -> str:
+    return os.path.join(index_dir, f"shard_{shard_id:03d}")
+
+
+def write_sharded_manifest(index_dir: str, n_shards: int) -> Dict[str, Any]:
+    """
+    샤드 manifest 들을 모아 상위 manifest.json 기록
+    - 아직 빌드되지 않았거나 문서가 없는 샤드는 count 0 으로 기록(조회 시 건너뜀)
+    - 모델/차원/청크 설정은 샤드끼리 같아야 함(다르면 ValueError)
+    """
+    entries: List[Dict[str, Any]] = []
+    base: Optional[Dict[str, Any]] = None
+    for i in range(n_shards):
+        m = read_manifest(shard_dir(index_dir, i))
+        count = int(m.get("count", 0)) if m else 0
+        entries.append({"id": i, "dir": os.path.basename(shard_dir(index_dir, i)), "count": count,
+                        "built_at": m.get("built_at") if m else None})
+        if not count:
+            continue
+        if base is None:
+            base = m
+        for k in ("model", "dim", "chunker", "chunk_size", "chunk_overlap"):
+            if m.get(k) != base.get(k):
+                raise ValueError(f"샤드 {i} 의 {k} 가 다른 샤드와 다릅니다. ({m.get(k)} != {base.get(k)})")
+    if base is None:
+        raise ValueError(f"문서가 있는 샤드가 없습니다: {index_dir}")
+    fields = {k: v for k, v in base.items() if k not in ("version", "built_at", "count", "updatable", "dedup")}
+    fields.update(count=sum(e["count"] for e in entries), shards=entries)
+    return write_manifest(index_dir, **fields)
+
+
+class ShardedStore:
+    """FaissStore 와 같은 검색 인터페이스(search / search_batch / set_search_params)"""
+
+    def __init__(self, shards: List[FaissStore]):
+        if not shards:
+            raise ValueError("샤드가 비어 있습니다.")
+        self.shards = shards
+        self.dim = shards[0].dim
+        self.sparse = None  # 하이브리드(BM25)는 단일 인덱스에서만 사용
+        self.columns = None
+        self._pool = _shard_pool()
+
+    @classmethod
+    def load(cls, index_dir: str, manifest: Optional[Dict[str, Any]] = None) -> "ShardedStore":
+        manifest = manifest or read_manifest(index_dir) or {}
+        shards = [FaissStore.load_dir(os.path.join(index_dir, e["dir"]))
+                  for e in manifest.get("shards", []) if e.get("count")]
+        return cls(shards)
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        for s in self.shards:
+            s.set_search_params(nprobe=nprobe, ef_search=ef_search)
+
+    def search(self, query_vec: np.ndarray, top_k: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        if query_vec.ndim == 1:
+            query_vec = query_vec[None, :]
+        return self.search_batch(query_vec[:1], top_k, filters=filters)[0]
+
+    def search_batch(self, query_matrix: np.ndarray, top_k: int = 5,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """샤드별 search_batch 를 병렬 실행 → 질의마다 점수 상위 top_k 병합"""
+        q = np.ascontiguousarray(np.atleast_2d(query_matrix), dtype="float32")
+        if not len(q):
+            return []
+        futures = [self._pool.submit(s.search_batch, q, top_k, filters) for s in self.shards]
+        per_shard = [f.result() for f in futures]
+        return [heapq.nlargest(top_k, (h for res in per_shard for h in res[qi]), key=lambda h: h["score"])
+                for qi in range(len(q))]
@@ -1,29 +1,217 @@
 # -*- coding: utf-8 -*-
-import os, json
-from typing import List, Dict, Any, Tuple
+import os, json, time
+from typing import List, Dict, Any, Tuple, Optional
 import numpy as np
 import faiss
 
+from .docstore import DocStore, DocStoreWriter
+from .manifest import read_manifest
+from .bm25 import BM25_NAME, BM25Index
+from .meta_columns import META_NAME, MetaColumns
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+QUANTIZE = {"fp16": "SQfp16", "int8": "SQ8"}  # 스칼라 양자화 → faiss 코덱 (벡터당 2D / 1D 바이트)
+VECTORS_NAME = "vectors.f32"  # 재순위용 원본 float32 벡터(위치 = 벡터 id, mmap)
+EXACT_FILTER_MAX = 4096  # 필터 허용 벡터가 이 이하면 근사 인덱스(IVF/HNSW) 대신 허용 id 만 직접 내적
+
+
+def index_factory_string(dim: int, index_type: str = "flat", n_vectors: int = 0,
+                         nlist: Optional[int] = None, pq_m: Optional[int] = None, hnsw_m: int = 32,
+                         quantize: Optional[str] = None) -> str:
+    """
+    index_type → faiss.index_factory 문자열
+    - ivf/ivfpq: nlist 미지정 시 4*sqrt(N) (학습 데이터가 centroid 당 39개 이상 되도록 제한),
+      검색 nprobe 기본값은 default_nprobe(nlist)
+    - ivfpq: pq_m 미지정 시 default_pq_m(dim) (서브벡터당 ≈16차원), N < 256*39 이면 PQ 코드북 학습 데이터 부족 → IVF-Flat
+    - quantize: fp16 | int8 → flat/ivf/hnsw 의 저장 벡터를 IndexScalarQuantizer 코덱으로 (ivfpq 는 이미 PQ 라 불가)
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 index_type 입니다: {index_type} (가능: {', '.join(INDEX_TYPES)})")
+    if quantize is not None and quantize not in QUANTIZE:
+        raise ValueError(f"지원하지 않는 quantize 입니다: {quantize} (가능: {', '.join(QUANTIZE)})")
+    if quantize and index_type == "ivfpq":
+        raise ValueError("ivfpq 는 이미 PQ 로 압축되므로 quantize 와 함께 쓸 수 없습니다.")
+    codec = QUANTIZE[quantize] if quantize else "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m},{codec}"
+    if index_type in ("ivf", "ivfpq"):
+        if nlist is None:
+            nlist = min(int(4 * np.sqrt(max(n_vectors, 1))), max(1, n_vectors // 39))
+        nlist = max(1, int(nlist))
+        if index_type == "ivfpq" and n_vectors >= 256 * 39:
+            m = int(pq_m) if pq_m else default_pq_m(dim)
+            if dim % m:
+                raise ValueError(f"pq_m({m}) 은 벡터 차원({dim})의 약수여야 합니다.")
+            return f"IVF{nlist},PQ{m}"
+        return f"IVF{nlist},{codec}"
+    return codec
+
+
+def default_pq_m(dim: int) -> int:
+    """
+    PQ 서브벡터 수 = 서브벡터당 차원이 16 에 가장 가까운 dim 의 약수 (예 1536 → 96, 100 → 5)
+    서브벡터당 4~64 차원으로 맞출 수 없으면(소수 차원 등) ValueError → pq_m 을 직접 지정
+    """
+    m = min((m for m in range(1, dim + 1) if dim % m == 0), key=lambda m: (abs(dim / m - 16), -m))
+    if not 4 <= dim // m <= 64:
+        raise ValueError(f"차원 {dim} 에 맞는 PQ 서브벡터 수를 정할 수 없습니다(서브벡터당 {dim // m}차원). "
+                         "--pq_m 으로 직접 지정하거나 ivf/hnsw 를 사용하세요.")
+    return m
+
+
+def is_lossy_factory(factory: str) -> bool:
+    """실제 생성된 factory 문자열이 손실 압축(PQ/SQ 코덱)인지 → float32 재순위 sidecar 가 의미 있는지
+    (ivfpq 도 벡터가 적으면 IVF-Flat 으로 떨어지므로 index_type 이 아니라 factory 로 판단)"""
+    return "PQ" in factory or "SQ" in factory
+
+
+def default_nprobe(nlist: int) -> int:
+    """IVF 기본 nprobe = nlist/16 (최소 8, 최대 nlist). faiss 기본값 1 은 nlist=4*sqrt(N) 에서 recall 이 너무 낮음"""
+    return min(int(nlist), max(8, int(nlist) // 16))
+
+
 class FaissStore:
-    def __init__(self, dim: int, index_path: str, docs_path: str):
+    def __init__(self, dim: int, index_path: str, docs_path: str, factory: str = "Flat"):
         self.dim = dim
         self.index_path = index_path
         self.docs_path = docs_path
-        self.index = faiss.IndexFlatIP(dim)  # 코사인=내적 (임베딩 정규화 가정)
+        # 코사인=내적 (임베딩 정규화 가정). 기본 "Flat" = IndexFlatIP
+        self.index = faiss.index_factory(dim, factory, faiss.METRIC_INNER_PRODUCT)
+        self._apply_default_nprobe()
         self.docs: List[Dict[str, Any]] = []
+        self.sparse = None  # 선택: bm25.BM25Index (registry 가 bm25.npz 가 있으면 연결)
+        self.columns = None  # 선택: meta_columns.MetaColumns (meta.npz, 검색 필터용)
+        # 선택: 재순위용 float32 sidecar. 양자화 인덱스에서 top_k*rerank_factor 후보를 원본 벡터 내적으로 재정렬
+        self.vectors_path: Optional[str] = None
+        self.rerank_factor = 0
+        self._vectors: Optional[np.ndarray] = None
 
     # ---------- Build ----------
-    def add(self, embeddings: np.ndarray, items: List[Dict[str, Any]]):
-        assert embeddings.shape[1] == self.dim
-        self.index.add(embeddings.astype("float32"))
+    def train(self, embeddings: np.ndarray, sample_size: int = 100_000, seed: int = 0):
+        """IVF/PQ 계열 학습. 벡터가 많으면 sample_size 개만 무작위 추출해 학습"""
+        if self.index.is_trained:
+            return
+        x = embeddings
+        if len(x) > sample_size:
+            rng = np.random.default_rng(seed)
+            x = x[rng.choice(len(x), sample_size, replace=False)]
+        self.index.train(np.ascontiguousarray(x, dtype="float32"))
+
+    def add(self, embeddings: np.ndarray, items: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        벡터/문서 추가. 벡터 id = docs 내 위치(append-only)
+        - ID 매핑 인덱스(IDMap2, IVF)는 add_with_ids 로 위치를 id 로 명시 → remove 후에도 위치 유지
+        - 반환: 추가된 id 배열
+        """
+        if not isinstance(self.docs, list):  # mmap 뷰로 로드된 경우 수정 전 메모리로 전환
+            self.docs = self.docs.to_list()
+        ids = self.add_vectors(embeddings, start_id=len(self.docs))
         self.docs.extend(items)
+        return ids
+
+    def add_vectors(self, embeddings: np.ndarray, start_id: int) -> np.ndarray:
+        """벡터만 추가(문서는 호출 측에서 별도 기록하는 스트리밍 빌드용). id = start_id 부터 연속"""
+        assert embeddings.shape[1] == self.dim
+        self.train(embeddings)
+        ids = np.arange(start_id, start_id + len(embeddings), dtype="int64")
+        if self.supports_remove:
+            self.index.add_with_ids(embeddings.astype("float32"), ids)
+        else:
+            self.index.add(embeddings.astype("float32"))
+        if self.vectors_path:
+            with open(self.vectors_path, "ab") as f:  # sidecar 행 = 벡터 id (tombstone 자리도 유지)
+                f.write(np.ascontiguousarray(embeddings, dtype="<f4").tobytes())
+            self._vectors = None
+        return ids
+
+    def attach_vectors(self, path: str, rerank_factor: int = 4, create: bool = False):
+        """재순위 sidecar 연결. create=True 면 빈 파일로 새로 시작(전체 빌드)"""
+        self.vectors_path = path
+        self.rerank_factor = int(rerank_factor)
+        if create:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "wb").close()
+        self._vectors = None
+
+    @property
+    def vectors(self) -> Optional[np.ndarray]:
+        """sidecar 의 (N, dim) float32 mmap 뷰 (추가가 있으면 다음 접근 시 다시 염)"""
+        if self._vectors is None and self.vectors_path and os.path.exists(self.vectors_path):
+            n = os.path.getsize(self.vectors_path) // (4 * self.dim)
+            if n:
+                self._vectors = np.memmap(self.vectors_path, dtype="<f4", mode="r", shape=(n, self.dim))
+        return self._vectors
+
+    @property
+    def supports_remove(self) -> bool:
+        """remove_ids 후에도 id 가 docs 위치와 일치하는 인덱스인지 (IDMap/IDMap2, IVF 계열)"""
+        idx = faiss.downcast_index(self.index)
+        if isinstance(idx, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            return True
+        try:
+            faiss.extract_index_ivf(self.index)
+            return True
+        except RuntimeError:
+            return False
+
+    def remove(self, ids) -> int:
+        """id 목록 삭제. 인덱스에서 제거하고 docs 자리는 None(tombstone)으로 비움"""
+        ids = np.asarray(sorted(set(int(i) for i in ids)), dtype="int64")
+        if not len(ids):
+            return 0
+        if not self.supports_remove:
+            raise ValueError("이 인덱스 타입은 삭제를 지원하지 않습니다(flat 은 IDMap2 로 생성 필요, hnsw 불가).")
+        if not isinstance(self.docs, list):
+            self.docs = self.docs.to_list()
+        removed = int(self.index.remove_ids(ids))
+        for i in ids:
+            self.docs[i] = None
+        return removed
+
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """검색 파라미터 조정(해당 인덱스 타입에만 적용, 나머지는 무시)"""
+        if nprobe:
+            try:
+                faiss.extract_index_ivf(self.index).nprobe = int(nprobe)
+            except RuntimeError:
+                pass
+        if ef_search:
+            idx = faiss.downcast_index(self.index)
+            if hasattr(idx, "hnsw"):
+                idx.hnsw.efSearch = int(ef_search)
+
+    def _apply_default_nprobe(self):
+        try:
+            ivf = faiss.extract_index_ivf(self.index)
+        except RuntimeError:
+            return
+        ivf.nprobe = default_nprobe(ivf.nlist)
+
+    @property
+    def search_params(self) -> Dict[str, Optional[int]]:
+        """현재 적용된 검색 파라미터 (manifest 기록용, 해당 없는 값은 None)"""
+        try:
+            nprobe = int(faiss.extract_index_ivf(self.index).nprobe)
+        except RuntimeError:
+            nprobe = None
+        idx = faiss.downcast_index(self.index)
+        if isinstance(idx, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            idx = faiss.downcast_index(idx.index)
+        return {"nprobe": nprobe, "ef_search": int(idx.hnsw.efSearch) if hasattr(idx, "hnsw") else None}
 
     def save(self):
+        self.save_index()
+        self.save_docs()
+
+    def save_docs(self):
+        # docs.jsonl + 조회용 mmap 문서 저장소(docs.idx/docs.bin)를 한 번에 기록
+        with DocStoreWriter(self.docs_path) as w:
+            for it in self.docs:
+                w.write(it)
+
+    def save_index(self):
         os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
         faiss.write_index(self.index, self.index_path)
-        with open(self.docs_path, "w", encoding="utf-8") as f:
-            for it in self.docs:
-                f.write(json.dumps(it, ensure_ascii=False) + "\n")
 
     # ---------- Load ----------
     @classmethod
@@ -32,26 +220,268 @@ class FaissStore:
         dim = index.d
         store = cls(dim, index_path, docs_path)
         store.index = index
+        store._apply_default_nprobe()  # nprobe 를 기록하지 않은 예전 manifest 도 기본값으로 (load_dir 에서 덮어씀)
+        # docs.idx/docs.bin 이 있고 벡터 수와 맞으면 mmap 으로 열기(전체 파싱 없음)
+        if DocStore.exists(docs_path):
+            docs = DocStore(docs_path)
+            if len(docs) >= index.ntotal:  # tombstone(삭제 자리) 포함 가능
+                store.docs = docs
+                return store
         store.docs = []
         with open(docs_path, "r", encoding="utf-8") as f:
             for line in f:
                 store.docs.append(json.loads(line))
         return store
 
+    @classmethod
+    def load_dir(cls, index_dir: str):
+        """index_dir 의 faiss.index/docs + 부가 파일(manifest 검색 파라미터, bm25.npz, meta.npz)까지 로드"""
+        store = cls.load(os.path.join(index_dir, "faiss.index"), os.path.join(index_dir, "docs.jsonl"))
+        manifest = read_manifest(index_dir) or {}
+        store.set_search_params(**(manifest.get("search_params") or {}))  # nprobe / efSearch
+        bm25_path = os.path.join(index_dir, BM25_NAME)
+        if os.path.exists(bm25_path):
+            store.sparse = BM25Index.load(bm25_path)
+        meta_path = os.path.join(index_dir, META_NAME)
+        if os.path.exists(meta_path):
+            store.columns = MetaColumns.load(meta_path)
+        factory = manifest.get("index_factory")
+        if manifest.get("rerank") and (factory is None or is_lossy_factory(factory)):
+            store.attach_vectors(os.path.join(index_dir, VECTORS_NAME), manifest["rerank"].get("factor", 4))
+        return store
+
     # ---------- Search ----------
-    def search(self, query_vec: np.ndarray, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search(self, query_vec: np.ndarray, top_k: int = 5,
+               filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         if query_vec.ndim == 1:
             query_vec = query_vec[None, :]
-        D, I = self.index.search(query_vec.astype("float32"), top_k)
-        out = []
-        for rank, (score, idx) in enumerate(zip(D[0], I[0])):
-            if idx == -1:
-                continue
-            doc = self.docs[idx]
-            out.append({
-                "doc_id": doc["id"],
-                "chunk": doc["text"],
-                "score": float(score),  # 내적값(정규화 가정 → 코사인)
-                "meta": doc.get("meta", {})
-            })
+        return self.search_batch(query_vec[:1], top_k, filters=filters)[0]
+
+    def filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """필터 → 허용 벡터 마스크(위치 = id). 필터가 없거나 전부 허용이면 None"""
+        if not filters:
+            return None
+        if self.columns is None:
+            raise ValueError("메타데이터 컬럼(meta.npz)이 없는 인덱스입니다. build_index 로 다시 생성하세요.")
+        mask = self.columns.mask(filters)
+        return None if mask.all() else mask
+
+    @property
+    def is_approximate(self) -> bool:
+        """IVF/HNSW 계열(검색이 근사)인지. Flat 은 IDSelector 필터까지 정확"""
+        try:
+            faiss.extract_index_ivf(self.index)
+            return True
+        except RuntimeError:
+            base = faiss.downcast_index(self.index)
+            if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+                base = faiss.downcast_index(base.index)
+            return hasattr(base, "hnsw")
+
+    def _search_params(self, mask: np.ndarray, k: int):
+        """
+        마스크 → faiss IDSelectorBitmap + 현재 efSearch 를 유지한 SearchParameters
+        - IVF 는 탐색하는 nprobe 개 리스트 안에서만 거르므로, 허용 비율이 낮을수록 nprobe 를 늘림
+          (탐색 리스트에 허용 벡터가 k 의 4배쯤 들어오도록, 최대 nlist = 전체 탐색 → 정확)
+        """
+        bits = np.packbits(mask, bitorder="little")
+        sel = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bits))
+        base = faiss.downcast_index(self.index)
+        if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            base = faiss.downcast_index(base.index)
+        try:
+            ivf = faiss.extract_index_ivf(self.index)
+            allowed = max(1, int(mask.sum()))
+            nprobe = min(ivf.nlist, max(ivf.nprobe, int(np.ceil(4 * k * ivf.nlist / allowed))))
+            params = faiss.SearchParametersIVF(sel=sel, nprobe=nprobe)
+        except RuntimeError:
+            if hasattr(base, "hnsw"):
+                params = faiss.SearchParametersHNSW(sel=sel, efSearch=base.hnsw.efSearch)
+            else:
+                params = faiss.SearchParameters(sel=sel)
+        return params, (bits, sel)  # bits/sel 은 검색이 끝날 때까지 참조 유지
+
+    def _search_exact(self, q: np.ndarray, mask: np.ndarray, top_k: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """좁은 필터: 허용 id 의 벡터(sidecar, 없으면 인덱스 reconstruct)와 직접 내적 → (D, I). 복원 불가면 None"""
+        ids = np.flatnonzero(mask).astype("int64")
+        vecs = self.vectors
+        if vecs is not None and ids[-1] < len(vecs):
+            x = np.asarray(vecs[ids], dtype="float32")
+        else:
+            try:
+                x = self.index.reconstruct_batch(ids)  # IVF 는 direct map 이 없으면 실패 → nprobe 확대로 처리
+            except RuntimeError:
+                return None
+        scores = q @ x.T
+        k = min(top_k, len(ids))
+        top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+        D = np.full((len(q), top_k), -np.inf, dtype="float32")
+        I = np.full((len(q), top_k), -1, dtype="int64")
+        D[:, :k] = np.take_along_axis(scores, top, axis=1)
+        I[:, :k] = ids[top]
+        return D, I
+
+    def search_ids(self, q: np.ndarray, top_k: int, filters: Optional[Dict[str, Any]] = None,
+                   rerank: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        faiss 검색 → (D, I). 필터는 IDSelector 로, sidecar 가 있으면 후보 top_k*rerank_factor 를 float32 로 재순위
+        - IVF/HNSW 에서 허용 벡터가 EXACT_FILTER_MAX 이하인 좁은 필터는 허용 id 만 직접 내적(정확)
+        """
+        mask = self.filter_mask(filters)
+        vecs = self.vectors if (rerank and self.rerank_factor > 1) else None
+        k = top_k * self.rerank_factor if vecs is not None else top_k
+        if mask is None:
+            D, I = self.index.search(q, k)
+        elif not mask.any():
+            return np.zeros((len(q), 0), dtype="float32"), np.zeros((len(q), 0), dtype="int64")
+        else:
+            if self.is_approximate and mask.sum() <= EXACT_FILTER_MAX:
+                exact = self._search_exact(q, mask, top_k)
+                if exact is not None:
+                    return exact
+            params, _keep = self._search_params(mask, k)
+            D, I = self.index.search(q, k, params=params)
+        if vecs is None:
+            return D, I
+        return _rerank(q, I, vecs, top_k)
+
+    def hit(self, idx: int, score: float) -> Optional[Dict[str, Any]]:
+        """docs 위치 → 검색 결과 dict (tombstone 이면 None)"""
+        return _to_hit(self.docs[idx], score)
+
+    def search_batch(self, query_matrix: np.ndarray, top_k: int = 5,
+                     filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        여러 질의를 faiss 1회 호출로 검색 (질의 행렬 (Q, D) → 질의별 결과 목록 Q개)
+        - 같은 문서가 여러 질의에 걸리면 mmap 디코딩은 한 번만 수행
+        - filters: meta_columns.MetaColumns.mask 형식. faiss 내부에서 IDSelector 로 걸러 over-fetch 없이 top_k 유지
+          · flat: 정확. IVF/HNSW: 허용 벡터가 EXACT_FILTER_MAX 이하면 허용 id 직접 내적(정확),
+            그보다 넓으면 근사 — IVF 는 허용 비율에 맞춰 nprobe 를 늘리지만 top_k 보다 적게 나올 수 있음
+        """
+        q = np.ascontiguousarray(np.atleast_2d(query_matrix), dtype="float32")
+        if not len(q):
+            return []
+        D, I = self.search_ids(q, top_k, filters=filters)
+        decoded: Dict[int, Optional[Dict[str, Any]]] = {}
+        for idx in np.unique(I[I >= 0]).tolist():
+            decoded[idx] = self.docs[idx]
+        out: List[List[Dict[str, Any]]] = []
+        for drow, irow in zip(D.tolist(), I.tolist()):
+            hits = []
+            for score, idx in zip(drow, irow):
+                if idx == -1:
+                    continue
+                h = _to_hit(decoded[idx], score)
+                if h is not None:
+                    hits.append(h)
+            out.append(hits)
         return out
+
+
+def dimension_report(embeddings: np.ndarray, dims: List[int], top_k: int = 10, n_queries: int = 200,
+                     seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Matryoshka 축소 차원별 recall@k (기준: 입력 차원 그대로의 Flat 정확 검색)
+    - 각 차원은 앞 d 성분 + 재정규화(= API dimensions 파라미터 결과)로 근사 → API 재호출 없이 비교
+    - 행마다 벡터당 바이트와 질의당 Flat 검색 시간 포함
+    """
+    from .embeddings import truncate_dims
+    x = np.ascontiguousarray(embeddings, dtype="float32")
+    rng = np.random.default_rng(seed)
+    qi = rng.choice(len(x), min(n_queries, len(x)), replace=False)
+    k = min(top_k, len(x))
+    full = faiss.IndexFlatIP(x.shape[1])
+    full.add(x)
+    _, gt = full.search(x[qi], k)
+    rows = []
+    for d in sorted({int(d) for d in dims if 0 < int(d) <= x.shape[1]} | {x.shape[1]}):
+        xd = truncate_dims(x, d)
+        idx = faiss.IndexFlatIP(d)
+        idx.add(xd)
+        t0 = time.perf_counter()
+        _, got = idx.search(xd[qi], k)
+        ms = (time.perf_counter() - t0) * 1000 / len(qi)
+        hits = sum(len(set(g) & set(t)) for g, t in zip(got, gt))
+        rows.append({"dim": d, f"recall@{k}": round(hits / (k * len(qi)), 4),
+                     "bytes_per_vec": 4 * d, "flat_ms": round(ms, 4)})
+    return rows
+
+
+def _rerank(q: np.ndarray, I: np.ndarray, vecs: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """후보 id 의 원본 벡터(mmap 행만 읽음)로 정확한 내적을 다시 계산해 top_k 재정렬"""
+    D2 = np.full((len(q), top_k), -np.inf, dtype="float32")
+    I2 = np.full((len(q), top_k), -1, dtype="int64")
+    for r in range(len(q)):
+        cand = I[r][(I[r] >= 0) & (I[r] < len(vecs))]
+        if not len(cand):
+            continue
+        scores = vecs[cand] @ q[r]
+        order = np.argsort(-scores, kind="stable")[:top_k]
+        D2[r, :len(order)] = scores[order]
+        I2[r, :len(order)] = cand[order]
+    return D2, I2
+
+
+def _to_hit(doc: Optional[Dict[str, Any]], score: float) -> Optional[Dict[str, Any]]:
+    if doc is None:
+        return None
+    return {
+        "doc_id": doc["id"],
+        "chunk": doc["text"],
+        "score": float(score),  # 내적값(정규화 가정 → 코사인)
+        "meta": doc.get("meta", {})
+    }
+
+
+def recall_report(store: FaissStore, embeddings: np.ndarray, top_k: int = 10, n_queries: int = 200,
+                  sweep: Optional[List[int]] = None, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    ANN 인덱스의 recall@k / 지연시간을 Flat(정확 검색) 기준과 비교
+    - 질의: 코퍼스 벡터 중 n_queries 개 샘플
+    - sweep: IVF 는 nprobe, HNSW 는 efSearch 후보값 목록 (None 이면 현재 설정만 측정)
+    - 재순위 sidecar 가 연결돼 있으면 마지막 행에 재순위 적용 결과(param="rerank") 추가
+    """
+    x = np.ascontiguousarray(embeddings, dtype="float32")
+    rng = np.random.default_rng(seed)
+    q = x[rng.choice(len(x), min(n_queries, len(x)), replace=False)]
+    k = min(top_k, len(x))
+
+    flat = faiss.IndexFlatIP(x.shape[1])
+    flat.add(x)
+    t0 = time.perf_counter()
+    _, gt = flat.search(q, k)
+    flat_ms = (time.perf_counter() - t0) * 1000 / len(q)
+
+    base = faiss.downcast_index(store.index)
+    is_hnsw = hasattr(base, "hnsw")
+    try:
+        ivf = faiss.extract_index_ivf(store.index)
+    except RuntimeError:
+        ivf = None
+    param = "efSearch" if is_hnsw else ("nprobe" if ivf is not None else None)
+    current = base.hnsw.efSearch if is_hnsw else (ivf.nprobe if ivf is not None else None)
+
+    rows = []
+    for v in (sweep if (sweep and param) else [current]):
+        if param == "nprobe":
+            store.set_search_params(nprobe=v)
+        elif param == "efSearch":
+            store.set_search_params(ef_search=v)
+        t0 = time.perf_counter()
+        _, got = store.index.search(q, k)
+        ann_ms = (time.perf_counter() - t0) * 1000 / len(q)
+        hits = sum(len(set(g[g >= 0]) & set(t)) for g, t in zip(got, gt))
+        rows.append({"param": param, "value": v, f"recall@{k}": round(hits / (k * len(q)), 4),
+                     "ann_ms": round(ann_ms, 4), "flat_ms": round(flat_ms, 4)})
+    if param == "nprobe":
+        store.set_search_params(nprobe=current)
+    elif param == "efSearch":
+        store.set_search_params(ef_search=current)
+    if store.vectors is not None and store.rerank_factor > 1:  # 현재 설정 + float32 재순위
+        t0 = time.perf_counter()
+        _, got = store.search_ids(q, k)
+        ann_ms = (time.perf_counter() - t0) * 1000 / len(q)
+        hits = sum(len(set(g[g >= 0]) & set(t)) for g, t in zip(got, gt))
+        rows.append({"param": "rerank", "value": store.rerank_factor, f"recall@{k}": round(hits / (k * len(q)), 4),
+                     "ann_ms": round(ann_ms, 4), "flat_ms": round(flat_ms, 4)})
+    return rows
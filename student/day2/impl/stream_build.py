@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+스트리밍 인덱싱 파이프라인 (메모리 상한 고정)
+- 생산자 스레드: 파일 탐색 → 읽기/정제 → 청크 → 배치 묶음을 bounded queue 에 투입
+- 소비자(호출 스레드): 배치 임베딩 → FAISS 추가 → docs.jsonl / docs.bin 에 즉시 기록
+- 큐가 가득 차면 생산자가 대기(backpressure) → 읽기와 임베딩이 겹치면서도 메모리는 queue_size 배치로 제한
+"""
+
+from __future__ import annotations
+import os, time, queue, threading
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+import numpy as np
+
+from .ingest import iter_corpus
+from .embeddings import Embeddings
+from .store import FaissStore, index_factory_string, is_lossy_factory, VECTORS_NAME
+from .docstore import DocStoreWriter
+
+_DONE = object()
+
+
+def iter_batches(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    buf: List[Dict[str, Any]] = []
+    try:
+        for it in items:
+            buf.append(it)
+            if len(buf) >= size:
+                yield buf
+                buf = []
+        if buf:
+            yield buf
+    finally:
+        if hasattr(items, "close"):  # 중간에 닫히면 원본 제너레이터(파싱 풀)도 바로 정리
+            items.close()
+
+
+def _put(q: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+    """stop 이 설정될 때까지 제한 시간 put 반복 (소비자가 멈춰도 생산자가 영원히 막히지 않음)"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(batches: Iterator[List[Dict[str, Any]]], q: "queue.Queue", stop: threading.Event):
+    try:
+        for b in batches:
+            if not _put(q, b, stop):
+                return
+        _put(q, _DONE, stop)
+    except BaseException as e:  # 생산자 예외는 소비자 쪽에서 다시 발생
+        _put(q, e, stop)
+    finally:
+        batches.close()  # iter_documents 의 프로세스 풀까지 종료
+
+
+def stream_build(paths: List[str], index_dir: str, emb: Embeddings,
+                 chunk_size: int | None = None, chunk_overlap: int | None = None, chunker: str = "token",
+                 index_type: str = "flat", nlist: Optional[int] = None, pq_m: Optional[int] = None,
+                 hnsw_m: int = 32, nprobe: Optional[int] = None, ef_search: Optional[int] = None,
+                 id_mapped: bool = False, quantize: Optional[str] = None, rerank_factor: int = 0,
+                 queue_size: int = 4, train_size: int = 50_000,
+                 parse_workers: int = 1, parse_timeout: float = 300.0) -> Dict[str, Any]:
+    """
+    반환: {"store", "factory", "dim", "count", "ids_by_path", "stats"}
+    - 학습이 필요한 타입(ivf/ivfpq, int8 양자화)은 처음 train_size 개 벡터까지만 버퍼링해 학습 후 흘려보냄
+      (nlist 미지정 시 버퍼 크기 기준으로 계산되므로 큰 코퍼스는 --nlist 지정 권장)
+    - docs 는 메모리에 보관하지 않음(store.docs 는 비어 있음)
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    index_path = os.path.join(index_dir, "faiss.index")
+    docs_path = os.path.join(index_dir, "docs.jsonl")
+
+    q: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+    stop = threading.Event()
+    batch_items = emb.batch_size * emb.max_workers  # 임베딩 1회 호출에서 워커들이 모두 일하도록
+    items = iter_corpus(paths, chunk_size, chunk_overlap, workers=parse_workers, timeout=parse_timeout,
+                        chunker=chunker)
+    producer = threading.Thread(target=_produce, args=(iter_batches(items, batch_items), q, stop), daemon=True)
+
+    store: Optional[FaissStore] = None
+    factory = ""
+    next_id = 0
+    ids_by_path: Dict[str, List[int]] = {}
+    pend_vecs: List[np.ndarray] = []
+    pend_items: List[Dict[str, Any]] = []
+    stats = {"chunks": 0, "batches": 0, "api_calls": 0, "retries": 0, "rate_limited": 0, "cache_hits": 0,
+             "embed_seconds": 0.0}
+    t0 = time.perf_counter()
+
+    def _flush(writer: DocStoreWriter):
+        nonlocal store, factory, next_id
+        if not pend_items:
+            return
+        vecs = np.vstack(pend_vecs)
+        if store is None:
+            factory = index_factory_string(int(vecs.shape[1]), index_type, len(vecs),
+                                           nlist=nlist, pq_m=pq_m, hnsw_m=hnsw_m, quantize=quantize)
+            if id_mapped and index_type == "flat":
+                factory = "IDMap2," + factory
+            store = FaissStore(int(vecs.shape[1]), index_path, docs_path, factory=factory)
+            if rerank_factor > 1 and is_lossy_factory(factory):  # 무손실로 떨어진 경우(IVF-Flat 등)는 sidecar 없음
+                store.attach_vectors(os.path.join(index_dir, VECTORS_NAME), rerank_factor, create=True)
+        ids = store.add_vectors(vecs, start_id=next_id)
+        for it, vid in zip(pend_items, ids.tolist()):
+            writer.write(it)
+            ids_by_path.setdefault(it["meta"]["path"], []).append(vid)
+        next_id += len(pend_items)
+        pend_vecs.clear()
+        pend_items.clear()
+
+    needs_training = index_type in ("ivf", "ivfpq") or quantize == "int8"  # SQ8 도 값 범위 학습 필요
+    producer.start()
+    try:
+        with DocStoreWriter(docs_path) as writer:
+            while True:
+                batch = q.get()
+                if batch is _DONE:
+                    break
+                if isinstance(batch, BaseException):
+                    raise batch
+                t1 = time.perf_counter()
+                vecs = emb.encode([it["text"] for it in batch])
+                stats["embed_seconds"] += time.perf_counter() - t1
+                stats["chunks"] += len(batch)
+                stats["batches"] += 1
+                for k in ("api_calls", "retries", "rate_limited", "cache_hits"):  # last_stats 는 배치 1회분 → 누적
+                    stats[k] += emb.last_stats.get(k, 0)
+                pend_vecs.append(vecs)
+                pend_items.extend(batch)
+                # 학습 전에는 train_size 까지 모아서 한 번에, 이후에는 배치마다 즉시 기록
+                if store is not None or not needs_training or len(pend_items) >= train_size:
+                    _flush(writer)
+            _flush(writer)
+    finally:
+        stop.set()
+        producer.join(timeout=5)
+
+    elapsed = time.perf_counter() - t0
+    stats["seconds"] = round(elapsed, 3)
+    stats["embed_seconds"] = round(stats["embed_seconds"], 3)
+    stats["chunks_per_sec"] = round(stats["chunks"] / elapsed, 1) if elapsed > 0 else 0.0
+    if store is None:  # 문서가 없으면 빈 인덱스(encode 의 빈 입력 규약과 같은 차원)
+        factory = "IDMap2,Flat" if id_mapped else "Flat"
+        store = FaissStore(emb.dimensions or 1536, index_path, docs_path, factory=factory)
+    store.set_search_params(nprobe=nprobe, ef_search=ef_search)
+    store.save_index()
+    return {"store": store, "factory": factory, "dim": store.dim,
+            "count": next_id, "ids_by_path": ids_by_path, "stats": stats}
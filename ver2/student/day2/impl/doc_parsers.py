@@ -4,6 +4,11 @@ from pathlib import Path
 from typing import List, Dict, Any
 import re, json, csv
 
+from student.day2.impl.parse_cache import cached_parse
+
+DOC_PARSER_VERSION = "doc_parsers-1"  # 리더/정규화 로직 변경 시 올려서 캐시 무효화
+_CACHED_EXTS = (".pdf", ".docx", ".doc", ".xlsx", ".xls")  # 추출 비용이 큰 포맷만 캐시
+
 # ───────────── 기본 유틸 ─────────────
 def _normalize_text(s: str) -> str:
     s = s.replace("\r\n", "\n").replace("\r", "\n")
@@ -68,6 +73,12 @@ def _read_txt(p: Path) -> str:
 
 # ───────────── 공개 함수 ─────────────
 def load_any(path: str) -> Dict[str, Any]:
+    """DAY2_PARSE_CACHE_DIR 지정 시 PDF/DOCX/XLSX 파싱 결과를 (경로, 크기, mtime, sha256, 버전) 기준으로 재사용"""
+    if Path(path).suffix.lower() in _CACHED_EXTS:
+        return cached_parse(path, DOC_PARSER_VERSION, _parse_any)
+    return _parse_any(path)
+
+def _parse_any(path: str) -> Dict[str, Any]:
     p = Path(path)
     ext = p.suffix.lower()  # 대소문자 무시
     if ext == ".pdf":